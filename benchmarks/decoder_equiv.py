@@ -0,0 +1,225 @@
+"""
+Equivalence check of the fixed-point gesture decoder against the original floating point one.
+
+The reference below is the float ratio maths and if/elif direction chain that the driver used
+before switching to fixed point and the GESTURE_DIRECTIONS table. The decoders are fed the same
+FIFO reads, from gesture_corpus.json at several read sizes and from random data, and the decoder
+state (U/D and L/R counts, near/far counts and state, direction) is compared after every read.
+
+The corpus must decode identically. Random data can produce ratio deltas exactly on a threshold,
+where the float decoder is off by a rounding error: such differences are accepted if the fixed
+point decoder agrees with the same decoder run on exact rationals.
+
+Usage::
+
+    python decoder_equiv.py [corpus.json] [--random N]
+
+Exits with status 1 on the first mismatch. Also reports the decode time of both decoders.
+"""
+
+import os
+import random
+import sys
+import time
+from fractions import Fraction
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+import host
+import bus
+import sl06
+from gesture_bench import load
+
+class FloatReference(sl06.SL06):
+
+    @staticmethod
+    def ratio(diff, total):
+        return (diff * 100) / total
+
+    def processGestureData(self):
+        data = self.gesture_data_
+        total = data.total_gestures
+        if total <= 4:
+            return False
+
+        u_first = d_first = l_first = r_first = 0
+        u_last = d_last = l_last = r_last = 0
+        if total <= 32 and total > 0:
+            th = sl06.GESTURE_THRESHOLD_OUT
+            for i in range(total):
+                if data.u_data[i] > th and data.d_data[i] > th and data.l_data[i] > th and data.r_data[i] > th:
+                    u_first, d_first, l_first, r_first = data.u_data[i], data.d_data[i], data.l_data[i], data.r_data[i]
+                    break
+            if u_first == 0 or d_first == 0 or l_first == 0 or r_first == 0:
+                return False
+            for i in range(total - 1, -1, -1):
+                if data.u_data[i] > th and data.d_data[i] > th and data.l_data[i] > th and data.r_data[i] > th:
+                    u_last, d_last, l_last, r_last = data.u_data[i], data.d_data[i], data.l_data[i], data.r_data[i]
+                    break
+
+        ratio = self.ratio
+        ud_delta = ratio(u_last - d_last, u_last + d_last) - ratio(u_first - d_first, u_first + d_first)
+        lr_delta = ratio(l_last - r_last, l_last + r_last) - ratio(l_first - r_first, l_first + r_first)
+        self.gesture_ud_delta_ += ud_delta
+        self.gesture_lr_delta_ += lr_delta
+
+        s1 = sl06.GESTURE_SENSITIVITY_1
+        s2 = sl06.GESTURE_SENSITIVITY_2
+        self.gesture_ud_count_ = 1 if self.gesture_ud_delta_ >= s1 else (-1 if self.gesture_ud_delta_ <= -s1 else 0)
+        self.gesture_lr_count_ = 1 if self.gesture_lr_delta_ >= s1 else (-1 if self.gesture_lr_delta_ <= -s1 else 0)
+
+        if self.gesture_ud_count_ == 0 and self.gesture_lr_count_ == 0:
+            if abs(ud_delta) < s2 and abs(lr_delta) < s2:
+                if ud_delta == 0 and lr_delta == 0:
+                    self.gesture_near_count_ += 1
+                else:
+                    self.gesture_far_count_ += 1
+                if self.gesture_near_count_ >= 10 and self.gesture_far_count_ >= 2:
+                    if ud_delta == 0 and lr_delta == 0:
+                        self.gesture_state_ = sl06.NEAR_STATE1
+                    elif ud_delta != 0 and lr_delta != 0:
+                        self.gesture_state_ = sl06.FAR_STATE1
+                    return True
+        else:
+            if abs(ud_delta) < s2 and abs(lr_delta) < s2:
+                if ud_delta == 0 and lr_delta == 0:
+                    self.gesture_near_count_ += 1
+                if self.gesture_near_count_ >= 10:
+                    self.gesture_ud_count_ = 0
+                    self.gesture_lr_count_ = 0
+                    self.gesture_ud_delta_ = 0
+                    self.gesture_lr_delta_ = 0
+        return False
+
+    def decodeGesture(self):
+        if self.gesture_state_ == sl06.NEAR_STATE1:
+            self.gesture_motion_ = sl06.DIR_NEAR
+            return True
+        if self.gesture_state_ == sl06.FAR_STATE1:
+            self.gesture_motion_ = sl06.DIR_FAR
+            return True
+        ud = self.gesture_ud_count_
+        lr = self.gesture_lr_count_
+        ud_wins = abs(self.gesture_ud_delta_) > abs(self.gesture_lr_delta_)
+        if ud == -1 and lr == 0:
+            self.gesture_motion_ = sl06.DIR_UP
+        elif ud == 1 and lr == 0:
+            self.gesture_motion_ = sl06.DIR_DOWN
+        elif ud == 0 and lr == 1:
+            self.gesture_motion_ = sl06.DIR_RIGHT
+        elif ud == 0 and lr == -1:
+            self.gesture_motion_ = sl06.DIR_LEFT
+        elif ud == -1 and lr == 1:
+            self.gesture_motion_ = sl06.DIR_UP if ud_wins else sl06.DIR_RIGHT
+        elif ud == 1 and lr == -1:
+            self.gesture_motion_ = sl06.DIR_DOWN if ud_wins else sl06.DIR_LEFT
+        elif ud == -1 and lr == -1:
+            self.gesture_motion_ = sl06.DIR_UP if ud_wins else sl06.DIR_LEFT
+        elif ud == 1 and lr == 1:
+            self.gesture_motion_ = sl06.DIR_DOWN if ud_wins else sl06.DIR_RIGHT
+        else:
+            self.gesture_motion_ = sl06.DIR_NONE
+            return False
+        return True
+
+class ExactReference(FloatReference):
+    # same decoder on exact rationals, to tell float rounding apart from fixed point errors
+
+    @staticmethod
+    def ratio(diff, total):
+        return Fraction(diff * 100, total)
+
+def state(sensor):
+    return (sensor.gesture_ud_count_, sensor.gesture_lr_count_, sensor.gesture_near_count_,
+            sensor.gesture_far_count_, sensor.gesture_state_, sensor.gesture_motion_)
+
+def compare(decoders, fifo, chunk):
+    # feeds the same reads to all the decoders, returns their final states
+    step = chunk * 4
+    states = [[] for d in decoders]
+    for i in range(0, len(fifo), step):
+        for k in range(len(decoders)):
+            decoders[k].feedGestureData(fifo[i:i + step])
+            states[k].append(state(decoders[k]))
+    for k in range(len(decoders)):
+        decoders[k].decodeGesture()
+        states[k].append(state(decoders[k]))
+        decoders[k].resetGestureParameters()
+    return states
+
+def timed(sensor, corpus, chunk):
+    step = chunk * 4
+    t = time.perf_counter()
+    for entry in corpus:
+        fifo = entry['fifo']
+        for i in range(0, len(fifo), step):
+            sensor.feedGestureData(fifo[i:i + step])
+        sensor.decodeGesture()
+        sensor.resetGestureParameters()
+    return time.perf_counter() - t
+
+def random_fifo(rng):
+    n = rng.randint(5, 80)
+    if rng.random() < 0.5:
+        # unstructured readings, including values at and below the threshold
+        return bytes(rng.randint(0, 255) for i in range(n * 4))
+    # random walk of a hand around the sensor, with plateaus that make ratios repeat
+    ds = [rng.randint(20, 200) for k in range(4)]
+    out = []
+    for i in range(n):
+        if rng.random() < 0.7:
+            k = rng.randrange(4)
+            ds[k] = max(0, min(255, ds[k] + rng.randint(-30, 30)))
+        out.extend(ds)
+    return bytes(out)
+
+def main(argv):
+    path = os.path.join(HERE, 'gesture_corpus.json')
+    count = 20000
+    args = list(argv)
+    while args:
+        arg = args.pop(0)
+        if arg == '--random':
+            count = int(args.pop(0))
+        else:
+            path = arg
+
+    corpus = load(path)
+    fixed = sl06.SL06(bus=bus.FakeBus())
+    ref = FloatReference(bus=bus.FakeBus())
+    exact = ExactReference(bus=bus.FakeBus())
+    decoders = (fixed, ref, exact)
+
+    # the corpus must decode identically
+    checked = 0
+    for chunk in (5, 6, 8, 12, 16, 24, 32):
+        for entry in corpus:
+            states = compare(decoders, entry['fifo'], chunk)
+            if states[0] != states[1]:
+                print('mismatch: corpus entry %s, %d datasets per read' % (entry['label'], chunk))
+                sys.exit(1)
+            checked += 1
+
+    # random data may hit exact ties (e.g. a delta of exactly 20%), where float rounding
+    # goes either way: there the fixed point decoder must agree with exact arithmetic
+    ties = 0
+    rng = random.Random(44)
+    for n in range(count):
+        fifo = random_fifo(rng)
+        chunk = rng.randint(5, 32)
+        states = compare(decoders, fifo, chunk)
+        if states[0] != states[1]:
+            if states[0] != states[2]:
+                print('mismatch: random sequence %d, %d datasets per read: %s' % (n, chunk, fifo.hex()))
+                sys.exit(1)
+            ties += 1
+        checked += 1
+    print('%d sequences decoded identically, except %d exact ties misjudged by the float decoder' % (checked, ties))
+
+    t_fixed = min(timed(fixed, corpus, 8) for r in range(5))
+    t_ref = min(timed(ref, corpus, 8) for r in range(5))
+    print('corpus decode time: fixed point %.1f ms, float reference %.1f ms' % (t_fixed * 1000, t_ref * 1000))
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
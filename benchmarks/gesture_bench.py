@@ -0,0 +1,106 @@
+"""
+Gesture decoder accuracy and throughput benchmark.
+
+Replays the labelled FIFO datasets of gesture_corpus.json through the SL06 gesture decoder,
+without a sensor, in reads of *chunk* datasets as :meth:`SL06.getGesture` would see them, and
+reports per-label accuracy, decoded gestures per second and memory used per gesture.
+
+Usage::
+
+    python gesture_bench.py [corpus.json] [--chunk N] [--repeat N]
+
+The decoder ignores reads of 4 datasets or less and needs at least 10 reads of a steady hand
+to report near or far, so results depend on *chunk* (default 8).
+
+Corpus entries are objects with ``label`` (one of up, down, left, right, near, far, none),
+``kind`` (synthetic or recorded) and ``datasets``, a list of [up, down, left, right] samples.
+"""
+
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+import host
+import bus
+import sl06
+
+def load(path):
+    with open(path) as f:
+        corpus = json.load(f)
+    # FIFO bytes are built once, outside the timed loop
+    for entry in corpus:
+        entry['fifo'] = bytes(v for ds in entry['datasets'] for v in ds)
+    return corpus
+
+def decode(sensor, fifo, chunk):
+    step = chunk * 4
+    for i in range(0, len(fifo), step):
+        sensor.feedGestureData(fifo[i:i + step])
+    sensor.decodeGesture()
+    motion = sensor.gesture_motion_
+    sensor.resetGestureParameters()
+    return motion
+
+def run(corpus, chunk, repeat):
+    sensor = sl06.SL06(bus=bus.FakeBus())
+
+    results = {}
+    for entry in corpus:
+        motion = decode(sensor, entry['fifo'], chunk)
+        ok, total, confusion = results.get(entry['label'], (0, 0, {}))
+        confusion[motion] = confusion.get(motion, 0) + 1
+        results[entry['label']] = (ok + (motion == entry['label']), total + 1, confusion)
+
+    t = time.perf_counter()
+    for r in range(repeat):
+        for entry in corpus:
+            decode(sensor, entry['fifo'], chunk)
+    elapsed = time.perf_counter() - t
+
+    # peak memory above the baseline while decoding, including the FIFO read buffers
+    tracemalloc.start()
+    peak = 0
+    for entry in corpus:
+        base = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        decode(sensor, entry['fifo'], chunk)
+        peak += tracemalloc.get_traced_memory()[1] - base
+    retained = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    return results, len(corpus) * repeat / elapsed, peak / len(corpus), retained
+
+def main(argv):
+    path = os.path.join(HERE, 'gesture_corpus.json')
+    chunk = 8
+    repeat = 20
+    args = list(argv)
+    while args:
+        arg = args.pop(0)
+        if arg == '--chunk':
+            chunk = int(args.pop(0))
+        elif arg == '--repeat':
+            repeat = int(args.pop(0))
+        else:
+            path = arg
+
+    corpus = load(path)
+    results, rate, peak, retained = run(corpus, chunk, repeat)
+
+    ok_all = 0
+    for label in sorted(results):
+        ok, total, confusion = results[label]
+        ok_all += ok
+        misses = ', '.join('%s: %d' % (k, v) for k, v in sorted(confusion.items()) if k != label)
+        print('%-6s %4d/%-4d %6.1f%%  %s' % (label, ok, total, 100 * ok / total, misses))
+    print('total  %4d/%-4d %6.1f%%' % (ok_all, len(corpus), 100 * ok_all / len(corpus)))
+    print('chunk %d datasets: %.0f gestures/s' % (chunk, rate))
+    print('memory: %.0f bytes peak per gesture, %d bytes retained after the corpus' % (peak, retained))
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,86 @@
+"""
+End-to-end gesture simulation on virtual time.
+
+Every gesture of gesture_corpus.json is queued on a :class:`bus.FakeBus` at the dataset rate of the
+sensor configuration and decoded by :meth:`SL06.getGesture`, FIFO pauses included. Driver and fake
+device share a :class:`bus.VirtualClock`, so the simulated time costs no real time.
+
+Usage::
+
+    python gesture_sim.py [corpus.json] [--repeat N] [--adaptive]
+
+Reports per-label and overall accuracy, the mean latency of getGesture(), simulated scenarios per second and the simulated against the real time.
+"""
+
+import os
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+import host
+import bus
+import sl06
+from gesture_bench import load
+
+def simulate(sensor, dev, clock, datasets, interval, latency):
+    dev.queueGesture(datasets, interval)
+    while dev.pending or dev.fifo:
+        if sensor.isGestureAvailable():
+            motion = sensor.getGesture()
+            latency.append(sensor.getGestureLatency())
+            # let the hand leave before the next scenario
+            clock.advance(100)
+            dev.fifo = []
+            dev.pending = []
+            return motion
+        clock.advance(1)
+    return sl06.DIR_NONE
+
+def main(argv):
+    path = os.path.join(HERE, 'gesture_corpus.json')
+    repeat = 10
+    adaptive = False
+    args = list(argv)
+    while args:
+        arg = args.pop(0)
+        if arg == '--repeat':
+            repeat = int(args.pop(0))
+        elif arg == '--adaptive':
+            adaptive = True
+        else:
+            path = arg
+
+    corpus = load(path)
+    clock = bus.VirtualClock()
+    dev = bus.FakeBus(clock=clock)
+    sensor = sl06.SL06(bus=dev, clock=clock)
+    sensor.init()
+    sensor.enableGestureSensor()
+    sensor.setAdaptiveGesturePause(adaptive)
+    # one dataset per gesture engine cycle, in whole ms
+    interval = max(1, (sensor._gestureCycleTime() + 500) // 1000)
+
+    ok = {}
+    total = {}
+    latency = []
+    t = time.perf_counter()
+    start = clock.now()
+    for r in range(repeat):
+        for entry in corpus:
+            label = entry['label']
+            motion = simulate(sensor, dev, clock, entry['datasets'], interval, latency)
+            ok[label] = ok.get(label, 0) + (motion == label)
+            total[label] = total.get(label, 0) + 1
+    elapsed = time.perf_counter() - t
+    simulated = (clock.now() - start) / 1000
+
+    for label in sorted(total):
+        print('%-6s %5d/%-5d %6.1f%%' % (label, ok[label], total[label], 100 * ok[label] / total[label]))
+    n = len(corpus) * repeat
+    print('all    %5d/%-5d %6.1f%%, mean getGesture() latency %.0f ms' % (sum(ok.values()), n, 100 * sum(ok.values()) / n, sum(latency) / max(1, len(latency))))
+    print('%d scenarios, %d ms per dataset: %.1f s simulated in %.2f s (%.0f scenarios/s, %.0fx real time)' % (n, interval, simulated, elapsed, n / elapsed, simulated / elapsed))
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
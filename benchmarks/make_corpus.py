@@ -0,0 +1,91 @@
+"""
+Generates the synthetic part of the gesture corpus used by gesture_bench.py.
+
+A hand is modelled as a blob crossing the sensor along a straight line. Each of the
+U/D/L/R photodiodes sees a bell-shaped pulse that peaks when the hand passes over its
+side of the sensor, plus an offset that grows as the hand gets closer. Swipes are
+generated at different speeds, distances, noise levels and angles (up to 30 degrees
+off-axis for the "diagonal" cases). Near and far cases are a hand held over the sensor,
+which the decoder reports once the readings have been steady for at least 10 FIFO reads.
+
+Usage::
+
+    python make_corpus.py > gesture_corpus.json
+
+The output is deterministic. Recorded sequences can be appended to the same file with
+"kind": "recorded"; gesture_bench.py treats both kinds alike.
+"""
+
+import json
+import math
+import random
+import sys
+
+# unit vectors of the photodiode sides, (x, y)
+SIDES = ((0, 1), (0, -1), (-1, 0), (1, 0))     # U, D, L, R
+
+# direction of motion of the hand for each label, as decoded by sl06
+MOTION = {
+    'up':       (0, -1),
+    'down':     (0, 1),
+    'left':     (1, 0),
+    'right':    (-1, 0),
+}
+
+def clamp(v):
+    return max(0, min(255, int(round(v))))
+
+def swipe(label, rng, angle=0.0):
+    n = rng.randint(14, 40)                     # datasets: fast to slow swipe
+    amp = rng.uniform(60, 240)                  # closer hands reflect more
+    noise = rng.uniform(0, 6)
+    width = rng.uniform(0.5, 0.9)
+    mx, my = MOTION[label]
+    a = math.radians(angle)
+    vx = mx * math.cos(a) - my * math.sin(a)
+    vy = mx * math.sin(a) + my * math.cos(a)
+    out = []
+    for i in range(n):
+        t = 2.4 * i / (n - 1) - 1.2             # hand position along its path
+        hx = vx * t
+        hy = vy * t
+        ds = []
+        for sx, sy in SIDES:
+            d2 = (hx - sx * 0.3) ** 2 + (hy - sy * 0.3) ** 2
+            ds.append(clamp(15 + amp * math.exp(-d2 / width) + rng.gauss(0, noise)))
+        out.append(ds)
+    return out
+
+def hover(label, rng):
+    # hand held over the sensor: steady readings, with a phase of small movements at
+    # the start (settling, "near") or at the end (starting to leave, "far")
+    level = rng.uniform(80, 220)
+    still = rng.randint(110, 160)
+    moving = rng.randint(24, 40)
+    out = []
+    for i in range(still + moving):
+        if (i < moving if label == 'near' else i >= still):
+            s = 1 if i % 2 else -1
+            du = s * rng.uniform(1, 3)
+            dl = s * rng.uniform(1, 3)
+            out.append([clamp(level + du), clamp(level - du), clamp(level + dl), clamp(level - dl)])
+        else:
+            out.append([clamp(level)] * 4)
+    return out
+
+def main():
+    rng = random.Random(9960)
+    corpus = []
+    for label in ('up', 'down', 'left', 'right'):
+        for i in range(30):
+            corpus.append({'label': label, 'kind': 'synthetic', 'case': 'swipe', 'datasets': swipe(label, rng)})
+        for i in range(10):
+            angle = rng.choice((-1, 1)) * rng.uniform(10, 30)
+            corpus.append({'label': label, 'kind': 'synthetic', 'case': 'diagonal', 'datasets': swipe(label, rng, angle)})
+    for label in ('near', 'far'):
+        for i in range(10):
+            corpus.append({'label': label, 'kind': 'synthetic', 'case': label, 'datasets': hover(label, rng)})
+    json.dump(corpus, sys.stdout, separators=(',', ':'))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,295 @@
+"""
+.. module:: bus
+
+*************
+Bus Module
+*************
+
+Bus backends for running the :class:`SL06` driver outside the Zerynth VM.
+
+A backend is any object with two methods:
+
+* ``write_read(reg, n)``: reads *n* bytes starting at register *reg* and returns them as bytes
+* ``write_bytes(reg, *data)``: writes *data* starting at register *reg*
+
+The APDS-9960 auto-increments the register address, so multi-byte transfers map to consecutive registers.
+Pass a backend to the driver with ``SL06(bus=LinuxBus(1))``, after importing :mod:`host` on a host; the
+Zerynth ``i2c`` backend is :class:`sl06.I2CBus`.
+
+For simulations, :class:`FakeBus` and :class:`VirtualClock` stand in for the sensor and for the passing of time::
+
+    clock = VirtualClock()
+    dev = FakeBus(clock=clock)
+    sensor = SL06(bus=dev, clock=clock)
+
+The driver then never waits: every ``sleep()`` advances the virtual time at once, and gesture datasets
+queued on the fake device enter its FIFO as the virtual time goes by.
+
+    """
+
+# linux/i2c-dev.h and linux/i2c.h #
+I2C_SLAVE               = 0x0703
+I2C_RDWR                = 0x0707
+I2C_M_RD                = 0x0001
+
+# APDS-9960 registers emulated by FakeBus #
+_ENABLE                 = 0x80
+_ATIME                  = 0x81
+_ID                     = 0x92
+_STATUS                 = 0x93
+_CDATAL                 = 0x94
+_CDATAH                 = 0x95
+_GCONF4                 = 0xAB
+_GFLVL                  = 0xAE
+_GSTATUS                = 0xAF
+_PICLEAR                = 0xE5
+_CICLEAR                = 0xE6
+_AICLEAR                = 0xE7
+_GFIFO_U                = 0xFC
+
+class LinuxBus():
+    """
+.. class:: LinuxBus(bus, addr=0x39)
+
+    Backend for the Linux i2c-dev interface. Register reads are issued as a single combined
+    write-read transaction (``I2C_RDWR``) with a repeated start, as on the MCU.
+
+    :param bus: I2C adapter number, e.g. 1 for ``/dev/i2c-1``
+    :param addr: Slave address, default 0x39
+    """
+
+    def __init__(self, bus, addr=0x39):
+        import os
+        import fcntl
+        import ctypes
+
+        class i2c_msg(ctypes.Structure):
+            _fields_ = [('addr', ctypes.c_uint16), ('flags', ctypes.c_uint16),
+                        ('len', ctypes.c_uint16), ('buf', ctypes.POINTER(ctypes.c_uint8))]
+
+        class i2c_rdwr_ioctl_data(ctypes.Structure):
+            _fields_ = [('msgs', ctypes.POINTER(i2c_msg)), ('nmsgs', ctypes.c_uint32)]
+
+        self._os = os
+        self._ioctl = fcntl.ioctl
+        self._ctypes = ctypes
+        self.addr = addr
+        self.fd = os.open('/dev/i2c-%d' % bus, os.O_RDWR)
+        fcntl.ioctl(self.fd, I2C_SLAVE, addr)
+
+        # transaction descriptors are allocated once and reused
+        self._reg = (ctypes.c_uint8 * 1)()
+        self._msgs = (i2c_msg * 2)()
+        self._msgs[0].addr = addr
+        self._msgs[0].flags = 0
+        self._msgs[0].len = 1
+        self._msgs[0].buf = self._reg
+        self._msgs[1].addr = addr
+        self._msgs[1].flags = I2C_M_RD
+        self._rdwr = i2c_rdwr_ioctl_data(self._msgs, 2)
+        self._bufs = {}
+
+    def write_read(self, reg, n):
+        buf = self._bufs.get(n)
+        if buf is None:
+            buf = (self._ctypes.c_uint8 * n)()
+            self._bufs[n] = buf
+        self._reg[0] = reg
+        self._msgs[1].len = n
+        self._msgs[1].buf = buf
+        self._ioctl(self.fd, I2C_RDWR, self._rdwr)
+        return bytes(buf)
+
+    def write_bytes(self, reg, *data):
+        self._os.write(self.fd, bytes((reg,) + data))
+
+    def close(self):
+        '''
+.. method:: close()
+
+        Closes the i2c-dev file descriptor.
+
+        '''
+        self._os.close(self.fd)
+
+class VirtualClock():
+    """
+.. class:: VirtualClock(start=0)
+
+    Simulated time for :class:`sl06.SL06` and :class:`FakeBus`. The time only changes on
+    :meth:`sleep` and :meth:`advance`, which return immediately.
+
+    :param start: Initial time in ms
+    """
+
+    def __init__(self, start=0):
+        self.time = start
+
+    def now(self):
+        '''
+.. method:: now()
+
+        Returns the virtual time in ms.
+
+        '''
+        return self.time
+
+    def sleep(self, ms):
+        '''
+.. method:: sleep(ms)
+
+        Advances the virtual time by *ms*.
+
+        '''
+        if ms > 0:
+            self.time += ms
+
+    def advance(self, ms):
+        '''
+.. method:: advance(ms)
+
+        Same as :meth:`sleep`, for use by the simulation rather than the driver.
+
+        '''
+        self.sleep(ms)
+
+class FakeBus():
+    """
+.. class:: FakeBus(device_id=0xAB, clock=None, max_clk=400000, light=None)
+
+    In-memory APDS-9960 for tests and simulations. Registers are a plain 256 byte file,
+    with the following behaviour emulated:
+
+    * gesture datasets queued with :meth:`queueGesture` are returned by GFIFO reads, GFLVL and GSTATUS.GVALID follow the queue;
+      with a *clock*, datasets can enter the FIFO over time, and those that find it full (32 datasets) are lost and set GSTATUS.GFOV
+    * writing GFIFO_CLR in GCONF4 empties the queue
+    * reading PICLEAR, CICLEAR or AICLEAR clears the matching STATUS bits
+    * above *max_clk*, set with :meth:`setClock`, reads return corrupted data, as with poor wiring
+    * with a *clock* and PON and AEN set, the ALS engine completes an integration every ATIME cycle (2.78ms steps):
+      STATUS.AVALID is set and, with a *light* function, the clear channel takes its value; reading the clear channel clears AVALID
+
+    The ``reads`` and ``writes`` attributes count bus transactions, ``lost`` the datasets lost on FIFO overflows.
+
+    :param device_id: Value of the ID register
+    :param clock: Time source for timed datasets, e.g. a :class:`VirtualClock` shared with the driver
+    :param max_clk: Fastest bus clock speed that gives correct reads
+    :param light: Function of the time in ms returning the clear channel level at the end of an integration
+    """
+
+    def __init__(self, device_id=0xAB, clock=None, max_clk=400000, light=None):
+        self.regs = bytearray(256)
+        self.regs[_ID] = device_id
+        self.clock = clock
+        self.clk = 100000
+        self.max_clk = max_clk
+        self.fifo = []
+        self.pending = []
+        self.overflow = False
+        self.lost = 0
+        self.light = light
+        self._als_due = None
+        self.reads = 0
+        self.writes = 0
+
+    def queueGesture(self, datasets, interval=0):
+        '''
+.. method:: queueGesture(datasets, interval=0)
+
+        Appends gesture datasets to the FIFO.
+
+        :param datasets: sequence of (up, down, left, right) tuples
+        :param interval: if not 0, the datasets enter the FIFO one every *interval* ms, after the ones already pending. Needs a *clock*
+
+        '''
+        if interval == 0:
+            for ds in datasets:
+                self.fifo.append(ds)
+            return
+        t = self.clock.now()
+        if self.pending and self.pending[-1][0] > t:
+            t = self.pending[-1][0]
+        for ds in datasets:
+            t += interval
+            self.pending.append((t, ds))
+
+    def _integrate(self):
+        # complete the ALS integrations that are due, times in us
+        if self.clock is None or self.regs[_ENABLE] & 0b11 != 0b11:
+            self._als_due = None
+            return
+        now = self.clock.now() * 1000
+        cycle = 2780 * (256 - self.regs[_ATIME])
+        if self._als_due is None:
+            self._als_due = now + cycle
+        while self._als_due <= now:
+            self.regs[_STATUS] |= 0b00000001
+            if self.light:
+                val = max(0, min(0xFFFF, int(self.light(self._als_due / 1000))))
+                self.regs[_CDATAL] = val & 0xFF
+                self.regs[_CDATAH] = val >> 8
+            self._als_due += cycle
+
+    def _release(self):
+        self._integrate()
+        # move the timed datasets that are due into the FIFO
+        if self.pending:
+            now = self.clock.now()
+            n = 0
+            while n < len(self.pending) and self.pending[n][0] <= now:
+                if len(self.fifo) < 32:
+                    self.fifo.append(self.pending[n][1])
+                else:
+                    self.overflow = True
+                    self.lost += 1
+                n += 1
+            del self.pending[:n]
+
+    def write_read(self, reg, n):
+        self.reads += 1
+        self._release()
+        if reg == _GFIFO_U:
+            out = bytearray(n)
+            for i in range(0, n, 4):
+                if self.fifo:
+                    out[i:i + 4] = bytes(self.fifo.pop(0))
+            if not self.fifo:
+                self.overflow = False
+            return bytes(out)
+        if reg == _PICLEAR:
+            self.regs[_STATUS] &= 0b10011111
+        elif reg == _CICLEAR:
+            self.regs[_STATUS] &= 0b00001111
+        elif reg == _AICLEAR:
+            self.regs[_STATUS] &= 0b11101111
+        out = bytearray(self.regs[reg:reg + n])
+        # reading the clear channel acknowledges the ALS result
+        if reg <= _CDATAH and reg + n > _CDATAL:
+            self.regs[_STATUS] &= 0b11111110
+        # FIFO level and status may be part of a burst
+        if reg <= _GFLVL < reg + n:
+            out[_GFLVL - reg] = min(len(self.fifo), 32)
+        if reg <= _GSTATUS < reg + n:
+            out[_GSTATUS - reg] = (1 if self.fifo else 0) | (2 if self.overflow else 0)
+        if self.clk > self.max_clk and n:
+            out[n - 1] ^= 0x01
+        return bytes(out)
+
+    def setClock(self, clk):
+        '''
+.. method:: setClock(clk)
+
+        Sets the emulated bus clock speed.
+
+        '''
+        self.clk = clk
+
+    def write_bytes(self, reg, *data):
+        self.writes += 1
+        for val in data:
+            if reg == _GCONF4 and val & 0b00000100:
+                self._release()
+                self.fifo = []
+                self.overflow = False
+                val &= 0b11111011
+            self.regs[reg] = val & 0xFF
+            reg += 1
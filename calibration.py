@@ -0,0 +1,143 @@
+"""
+.. module:: calibration
+
+*******************
+Calibration Module
+*******************
+
+Persistent storage of the SL06 calibration and configuration (offsets, gains, thresholds, timings)
+as a compact versioned record, so that a device restarts calibrated.
+
+A record is made of a header (magic ``S6``, u8 version, u8 payload length), the payload with the
+register fields of that version in a fixed order, and a CRC-16/CCITT of header and payload. All
+multi-byte fields are little endian. The version 1 payload is 31 bytes, 37 bytes in total.
+
+Records are written to and read from any stream with ``write`` and ``read`` methods: a file, or a
+flash region (e.g. ``flash.FlashFileStream``; call its ``flush()`` after :func:`save`)::
+
+    try:
+        config = calibration.load(stream)
+    except ValueError:
+        config = None                       # blank, corrupted or unknown record: use the defaults
+    sensor.init(config)
+    ...
+    # after calibrating
+    calibration.save(sensor.getConfig(calibration.NAMES), stream)
+
+The module has no dependency on the Zerynth runtime, so records can also be prepared on the host.
+
+    """
+
+import struct
+
+MAGIC                   = b'S6'
+VERSION                 = 1
+
+# Payload layouts: (field name, struct code) in record order, names as in sl06.FIELDS #
+LAYOUTS = {
+    1: (
+        ('atime', 'B'), ('wtime', 'B'), ('ailt', 'H'), ('aiht', 'H'), ('pilt', 'B'), ('piht', 'B'),
+        ('pers', 'B'), ('config1', 'B'), ('ppulse', 'B'), ('ldrive', 'B'), ('pgain', 'B'), ('again', 'B'),
+        ('config2', 'B'), ('poffset_ur', 'B'), ('poffset_dl', 'B'), ('config3', 'B'),
+        ('gpenth', 'B'), ('gexth', 'B'), ('gconf1', 'B'), ('ggain', 'B'), ('gldrive', 'B'), ('gwtime', 'B'),
+        ('goffset_u', 'B'), ('goffset_d', 'B'), ('goffset_l', 'B'), ('goffset_r', 'B'),
+        ('gpulse', 'B'), ('gconf3', 'B'), ('gien', 'B'),
+    ),
+}
+
+# Field names stored by the current version #
+NAMES = tuple(entry[0] for entry in LAYOUTS[VERSION])
+
+_HEADER = '<2sBB'
+_HEADER_SIZE = 4
+_CRC_SIZE = 2
+
+def _format(version):
+    return '<' + ''.join(entry[1] for entry in LAYOUTS[version])
+
+def crc16(data, crc=0xFFFF):
+    '''
+.. function:: crc16(data, crc=0xFFFF)
+
+    Returns the CRC-16/CCITT (polynomial 0x1021) of *data*.
+
+    '''
+    for b in data:
+        crc ^= b << 8
+        for i in range(8):
+            if crc & 0x8000:
+                crc = ((crc << 1) ^ 0x1021) & 0xFFFF
+            else:
+                crc = (crc << 1) & 0xFFFF
+    return crc
+
+def encode(fields):
+    '''
+.. function:: encode(fields)
+
+    Packs a record of the current version.
+
+    :param fields: dict of field values, e.g. from :meth:`SL06.getConfig`; must contain all the ``NAMES``
+
+    Returns the record as bytes. Raises ValueError if a field is missing or out of range.
+
+    '''
+    try:
+        values = [fields[entry[0]] for entry in LAYOUTS[VERSION]]
+        payload = struct.pack(_format(VERSION), *values)
+    except (KeyError, struct.error):
+        raise ValueError
+    data = struct.pack(_HEADER, MAGIC, VERSION, len(payload)) + payload
+    return data + struct.pack('<H', crc16(data))
+
+def decode(data):
+    '''
+.. function:: decode(data)
+
+    Unpacks a record.
+
+    Returns a dict of field values, to be passed to :meth:`SL06.init`. Raises ValueError if the
+    record is truncated or corrupted, or if its version is unknown.
+
+    '''
+    if len(data) < _HEADER_SIZE + _CRC_SIZE:
+        raise ValueError
+    magic, version, size = struct.unpack(_HEADER, data[0:_HEADER_SIZE])
+    if magic != MAGIC or version not in LAYOUTS:
+        raise ValueError
+    fmt = _format(version)
+    end = _HEADER_SIZE + size
+    if size != struct.calcsize(fmt) or len(data) < end + _CRC_SIZE:
+        raise ValueError
+    if struct.unpack('<H', data[end:end + _CRC_SIZE])[0] != crc16(data[0:end]):
+        raise ValueError
+    values = struct.unpack(fmt, data[_HEADER_SIZE:end])
+    fields = {}
+    layout = LAYOUTS[version]
+    for i in range(len(layout)):
+        fields[layout[i][0]] = values[i]
+    return fields
+
+def save(fields, stream):
+    '''
+.. function:: save(fields, stream)
+
+    Writes a record of *fields* to *stream*.
+
+    '''
+    stream.write(encode(fields))
+
+def load(stream):
+    '''
+.. function:: load(stream)
+
+    Reads a record from *stream*.
+
+    Returns a dict of field values. Raises ValueError if no valid record is found.
+
+    '''
+    header = stream.read(_HEADER_SIZE)
+    if len(header) < _HEADER_SIZE:
+        raise ValueError
+    size = header[3]
+    return decode(header + stream.read(size + _CRC_SIZE))
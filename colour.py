@@ -0,0 +1,87 @@
+"""
+.. module:: colour
+
+***************
+Colour Module
+***************
+
+Colour classification against a palette of reference colours.
+
+Red, green and blue are normalised by the clear channel, so the classification does not depend on
+the light level, and quantised on a cube of *levels* steps per axis. The nearest palette entry of
+every cell of the cube is computed once when the classifier is built and stored in a bytearray, so
+classifying a reading is a few integer operations and one table lookup whatever the palette size.
+
+    """
+
+class ColourClassifier():
+    """
+.. class:: ColourClassifier(palette, levels=16)
+
+    Builds the lookup table for *palette*. Building costs ``levels ** 3 * len(palette)`` distance
+    computations and ``levels ** 3`` bytes of memory.
+
+    :param palette: list of (name, (clear, red, green, blue)) reference readings, e.g. from :meth:`SL06.getColourData`; at most 255 entries
+    :param levels: quantisation steps per axis
+    """
+
+    def __init__(self, palette, levels=16):
+        if len(palette) == 0 or len(palette) > 255:
+            raise ValueError
+        self.levels = levels
+        self.names = [entry[0] for entry in palette]
+        refs = []
+        for entry in palette:
+            c, r, g, b = entry[1]
+            if c == 0:
+                raise ValueError
+            refs.append((r / c, g / c, b / c))
+
+        self.table = bytearray(levels * levels * levels)
+        idx = 0
+        for qr in range(levels):
+            fr = (qr + 0.5) / levels
+            for qg in range(levels):
+                fg = (qg + 0.5) / levels
+                for qb in range(levels):
+                    fb = (qb + 0.5) / levels
+                    best = 0
+                    best_d = -1
+                    for i in range(len(refs)):
+                        ref = refs[i]
+                        d = (fr - ref[0]) * (fr - ref[0]) + (fg - ref[1]) * (fg - ref[1]) + (fb - ref[2]) * (fb - ref[2])
+                        if best_d < 0 or d < best_d:
+                            best_d = d
+                            best = i
+                    self.table[idx] = best
+                    idx += 1
+
+    def _quantise(self, val, clear):
+        q = val * self.levels // clear
+        if q >= self.levels:
+            return self.levels - 1
+        return q
+
+    def classifyIndex(self, clear, red, green, blue):
+        '''
+.. method:: classifyIndex(clear, red, green, blue)
+
+        Returns the palette index of the nearest reference colour, -1 if *clear* is 0.
+
+        '''
+        if clear == 0:
+            return -1
+        levels = self.levels
+        return self.table[(self._quantise(red, clear) * levels + self._quantise(green, clear)) * levels + self._quantise(blue, clear)]
+
+    def classify(self, clear, red, green, blue):
+        '''
+.. method:: classify(clear, red, green, blue)
+
+        Returns the name of the nearest reference colour, None if *clear* is 0.
+
+        '''
+        i = self.classifyIndex(clear, red, green, blue)
+        if i < 0:
+            return None
+        return self.names[i]
@@ -0,0 +1,183 @@
+"""
+.. module:: combo
+
+***************
+Combo Module
+***************
+
+Recognition of gesture sequences (combos), such as left-right-left or up-up.
+
+The registered combos are compiled once into a trie with failure links (an Aho-Corasick automaton),
+stored as a transition table: every gesture costs one table lookup, whatever the number and the
+length of the combos, and a combo may start after stray gestures. Gestures belong to the same
+sequence while each one follows the previous within a timeout.
+
+Gestures are fed with :meth:`ComboRecogniser.update`, for example straight from :meth:`SL06.getGesture`
+or as the *on_gesture* callback of a :class:`Scheduler`::
+
+    combos = ComboRecogniser([('cancel', ('left', 'right', 'left')), ('confirm', ('up', 'up'))], timeout=800, now=timers.now)
+    while True:
+        name = combos.update(sensor.getGesture())
+        if name:
+            print(name)
+
+    """
+
+class ComboRecogniser():
+    """
+.. class:: ComboRecogniser(combos, timeout=1000, now=None, on_combo=None)
+
+    Streaming matcher of gesture sequences.
+
+    A combo is reported as soon as its last gesture arrives, unless it is the beginning of a longer
+    combo: then it is reported when the next gesture does not continue the longer one, or when the
+    sequence times out (see :meth:`poll`). Gestures are not shared: after a report, matching starts again
+    from the next gesture.
+
+    :param combos: list of (name, sequence) pairs; a sequence is a tuple of gesture directions, e.g. ``('up', 'up')``
+    :param timeout: Maximum time between two gestures of a sequence, in the unit of *now* (e.g. ms)
+    :param now: Function returning the current time, e.g. ``timers.now``; needed unless the time is passed to :meth:`update` and :meth:`poll`
+    :param on_combo: Function called with the name of every recognised combo
+    """
+
+    def __init__(self, combos, timeout=1000, now=None, on_combo=None):
+        self.timeout = timeout
+        self._now = now
+        self.on_combo = on_combo
+
+        # gesture alphabet
+        self._symbols = {}
+        for entry in combos:
+            if len(entry[1]) == 0:
+                raise ValueError
+            for direction in entry[1]:
+                if direction not in self._symbols:
+                    self._symbols[direction] = len(self._symbols)
+        nsym = len(self._symbols)
+
+        # trie
+        children = [{}]
+        match = [None]
+        depth = [0]
+        for entry in combos:
+            node = 0
+            for direction in entry[1]:
+                sym = self._symbols[direction]
+                nxt = children[node].get(sym)
+                if nxt is None:
+                    nxt = len(children)
+                    children[node][sym] = nxt
+                    children.append({})
+                    match.append(None)
+                    depth.append(depth[node] + 1)
+                node = nxt
+            match[node] = entry[0]
+
+        # failure links, in breadth-first order, folded into a complete transition table
+        self._goto = [None for x in range(len(children))]
+        self._leaf = [len(c) == 0 for c in children]
+        fail = [0 for x in range(len(children))]
+        self._goto[0] = [children[0].get(sym, 0) for sym in range(nsym)]
+        queue = [children[0][sym] for sym in children[0]]
+        head = 0
+        while head < len(queue):
+            node = queue[head]
+            head += 1
+            if match[node] is None:
+                match[node] = match[fail[node]]
+            row = self._goto[fail[node]][:]
+            for sym in children[node]:
+                child = children[node][sym]
+                fail[child] = self._goto[fail[node]][sym]
+                row[sym] = child
+                queue.append(child)
+            self._goto[node] = row
+        self._match = match
+        self._depth = depth
+        self.reset()
+
+    def reset(self):
+        '''
+.. method:: reset()
+
+        Drops the current sequence.
+
+        '''
+        self._state = 0
+        self._pending = None
+        self._last = 0
+
+    def _report(self, name):
+        if self.on_combo:
+            self.on_combo(name)
+        return name
+
+    def poll(self, now=None):
+        '''
+.. method:: poll(now=None)
+
+        Ends the current sequence if its last gesture is older than the timeout, reporting the
+        combo it completed, if any. Call it periodically to get combos that are the beginning of
+        longer ones without waiting for the next gesture.
+
+        :param now: current time, default from the *now* function
+
+        Returns the name of the reported combo, or None.
+
+        '''
+        if self._state == 0:
+            return None
+        if now is None:
+            now = self._now()
+        if now - self._last <= self.timeout:
+            return None
+        name = self._pending
+        self._state = 0
+        self._pending = None
+        if name is not None:
+            return self._report(name)
+        return None
+
+    def update(self, direction, now=None):
+        '''
+.. method:: update(direction, now=None)
+
+        Feeds a gesture. ``'none'`` and directions not used by any combo are allowed: the first only
+        checks the timeout, the others break the current sequence.
+
+        :param direction: gesture direction, as returned by :meth:`SL06.getGesture`
+        :param now: time of the gesture, default from the *now* function
+
+        Returns the name of the combo recognised by this call, or None. If two combos are
+        recognised at once (an expired or interrupted shorter combo, then a combo completed by
+        this gesture), both are passed to *on_combo* and the last one is returned.
+
+        '''
+        if now is None:
+            now = self._now()
+        res = self.poll(now)
+        if direction == 'none':
+            return res
+
+        sym = self._symbols.get(direction)
+        self._last = now
+        state = self._state
+        if sym is None:
+            nxt = 0
+        else:
+            nxt = self._goto[state][sym]
+        if self._pending is not None and self._depth[nxt] != self._depth[state] + 1:
+            # the sequence does not continue the pending combo: report it and restart with this gesture
+            res = self._report(self._pending)
+            self._pending = None
+            nxt = 0 if sym is None else self._goto[0][sym]
+
+        if self._leaf[nxt] and nxt != 0:
+            res = self._report(self._match[nxt])
+            self._state = 0
+            self._pending = None
+            return res
+        if self._match[nxt] is not None:
+            self._pending = self._match[nxt]
+        self._state = nxt
+        return res
@@ -6,11 +6,15 @@
 #   SL06 is enabled as a light sensor.
 #
 #   The ambient light level is measured and
-#   displayed on the serial console.
+#   displayed on the serial console when it
+#   changes by more than 10% or at least
+#   once a minute.
 ###############################################
 
 import streams
+import timers
 from xinabox.sl06 import sl06
+from xinabox.sl06 import filters
 
 streams.serial()
 
@@ -23,8 +27,12 @@ SL06.init()
 # enable SL06 for light sensing
 SL06.enableLightSensor()
 
+# report on 10% change or every 60 seconds
+report = filters.Deadband(relative=0.1, max_interval=60000)
+
 while True:
     light = SL06.getAmbientLight()  # read the the ambient light level
-    print('Ambient Light Level: ', light)
+    if report.update(light, timers.now()):
+        print('Ambient Light Level: ', light)
     
     sleep(2000)
@@ -0,0 +1,37 @@
+###############################################
+#   This is an example for the SL06 ambient
+#   light, colour, gesture and proximity
+#   sensor.
+#
+#   SL06 is enabled as a proximity-gated
+#   colour sensor.
+#
+#   Place an object in front of the sensor
+#   to determine how much red, green and blue
+#   light it possesses. Each object is
+#   sampled once while it stays in front of
+#   the sensor.
+###############################################
+
+import streams
+from xinabox.sl06 import sl06
+
+streams.serial()
+
+# SL06 instance
+SL06 = sl06.SL06(I2C0)
+
+# configure SL06
+SL06.init()
+
+# sample the colour when an object comes close
+gate = sl06.ColourGate(SL06, threshold=50)
+
+while True:
+    frame = gate.poll()     # one STATUS read unless an object arrived
+    if frame is not None:
+        print('RED   :', frame.red)
+        print('GREEN :', frame.green)
+        print('BLUE  :', frame.blue)
+    
+    sleep(100)
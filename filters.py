@@ -0,0 +1,435 @@
+"""
+.. module:: filters
+
+***************
+Filters Module
+***************
+
+Streaming filters for the SL06 light, colour and proximity channels.
+Every filter keeps its history in a fixed-size ring buffer allocated at
+construction and is updated in constant time per sample, so attaching a
+filter to a channel costs no allocations while sampling.
+
+A filter can be used on its own or attached to an SL06 channel with
+:meth:`SL06.attachFilter`, in which case the channel getter returns the
+filtered value.
+
+The module also provides :class:`Deadband`, a report-on-change stage that
+suppresses readings that did not move enough to be worth sending.
+
+    """
+
+class MovingAverage():
+    """
+.. class:: MovingAverage(size)
+
+    Arithmetic mean of the last *size* samples.
+
+    :param size: Window length in samples
+    """
+
+    def __init__(self, size):
+        self._buf = [0 for x in range(size)]
+        self._size = size
+        self._pos = 0
+        self._count = 0
+        self._sum = 0
+
+    def update(self, value):
+        '''
+.. method:: update(value)
+
+        Adds a sample to the window.
+
+        Returns the mean of the samples in the window.
+
+        '''
+        if self._count == self._size:
+            self._sum -= self._buf[self._pos]
+        else:
+            self._count += 1
+        self._buf[self._pos] = value
+        self._sum += value
+        self._pos += 1
+        if self._pos == self._size:
+            self._pos = 0
+        return self._sum / self._count
+
+    def value(self):
+        '''
+.. method:: value()
+
+        Returns the current mean, 0 if no sample was added yet.
+
+        '''
+        if self._count == 0:
+            return 0
+        return self._sum / self._count
+
+    def reset(self):
+        '''
+.. method:: reset()
+
+        Empties the window.
+
+        '''
+        self._pos = 0
+        self._count = 0
+        self._sum = 0
+
+class EMA():
+    """
+.. class:: EMA(alpha)
+
+    Exponential moving average: ``y = y + alpha * (x - y)``.
+
+    :param alpha: Smoothing factor between 0 and 1, higher values follow the input faster
+    """
+
+    def __init__(self, alpha):
+        self._alpha = alpha
+        self._value = 0
+        self._primed = False
+
+    def update(self, value):
+        '''
+.. method:: update(value)
+
+        Adds a sample. The first sample initializes the average.
+
+        Returns the smoothed value.
+
+        '''
+        if self._primed:
+            self._value += self._alpha * (value - self._value)
+        else:
+            self._value = value
+            self._primed = True
+        return self._value
+
+    def value(self):
+        '''
+.. method:: value()
+
+        Returns the current smoothed value.
+
+        '''
+        return self._value
+
+    def reset(self):
+        '''
+.. method:: reset()
+
+        Forgets the current average.
+
+        '''
+        self._value = 0
+        self._primed = False
+
+class RunningMedian():
+    """
+.. class:: RunningMedian(size)
+
+    Median of the last *size* samples. Meant for small windows (3 to 15 samples):
+    the samples are kept both in arrival order and in a sorted buffer that is
+    updated in place, so no list is built per sample.
+
+    :param size: Window length in samples
+    """
+
+    def __init__(self, size):
+        self._buf = [0 for x in range(size)]
+        self._sorted = [0 for x in range(size)]
+        self._size = size
+        self._pos = 0
+        self._count = 0
+
+    def update(self, value):
+        '''
+.. method:: update(value)
+
+        Adds a sample to the window.
+
+        Returns the median of the samples in the window.
+
+        '''
+        srt = self._sorted
+        n = self._count
+        if n == self._size:
+            # remove the oldest sample from the sorted buffer
+            old = self._buf[self._pos]
+            i = 0
+            while srt[i] != old:
+                i += 1
+            while i < n - 1:
+                srt[i] = srt[i + 1]
+                i += 1
+            n -= 1
+        else:
+            self._count += 1
+
+        # insert the new sample keeping the buffer sorted
+        i = n
+        while i > 0 and srt[i - 1] > value:
+            srt[i] = srt[i - 1]
+            i -= 1
+        srt[i] = value
+
+        self._buf[self._pos] = value
+        self._pos += 1
+        if self._pos == self._size:
+            self._pos = 0
+        return self.value()
+
+    def value(self):
+        '''
+.. method:: value()
+
+        Returns the current median, 0 if no sample was added yet.
+
+        '''
+        n = self._count
+        if n == 0:
+            return 0
+        if n & 1:
+            return self._sorted[n >> 1]
+        return (self._sorted[(n >> 1) - 1] + self._sorted[n >> 1]) / 2
+
+    def reset(self):
+        '''
+.. method:: reset()
+
+        Empties the window.
+
+        '''
+        self._pos = 0
+        self._count = 0
+
+class MinMax():
+    """
+.. class:: MinMax(size)
+
+    Minimum and maximum of the last *size* samples, tracked with two monotonic
+    queues stored in fixed ring buffers (amortized constant time per sample).
+
+    :meth:`update` returns the maximum, so an attached MinMax makes the channel getter
+    a peak hold; the minimum is read with :meth:`min` or :meth:`value`.
+
+    :param size: Window length in samples
+    """
+
+    def __init__(self, size):
+        self._size = size
+        self._seq = 0
+        # monotonic queues of (sequence number, value)
+        self._min_s = [0 for x in range(size)]
+        self._min_v = [0 for x in range(size)]
+        self._max_s = [0 for x in range(size)]
+        self._max_v = [0 for x in range(size)]
+        self._min_head = 0
+        self._min_len = 0
+        self._max_head = 0
+        self._max_len = 0
+
+    def update(self, value):
+        '''
+.. method:: update(value)
+
+        Adds a sample to the window.
+
+        Returns the maximum of the samples in the window.
+
+        '''
+        size = self._size
+        seq = self._seq
+        self._seq += 1
+        oldest = seq - size + 1
+
+        # min queue: drop expired head, then larger tail values
+        if self._min_len and self._min_s[self._min_head] < oldest:
+            self._min_head = (self._min_head + 1) % size
+            self._min_len -= 1
+        while self._min_len:
+            tail = (self._min_head + self._min_len - 1) % size
+            if self._min_v[tail] < value:
+                break
+            self._min_len -= 1
+        tail = (self._min_head + self._min_len) % size
+        self._min_s[tail] = seq
+        self._min_v[tail] = value
+        self._min_len += 1
+
+        # max queue: drop expired head, then smaller tail values
+        if self._max_len and self._max_s[self._max_head] < oldest:
+            self._max_head = (self._max_head + 1) % size
+            self._max_len -= 1
+        while self._max_len:
+            tail = (self._max_head + self._max_len - 1) % size
+            if self._max_v[tail] > value:
+                break
+            self._max_len -= 1
+        tail = (self._max_head + self._max_len) % size
+        self._max_s[tail] = seq
+        self._max_v[tail] = value
+        self._max_len += 1
+
+        return self._max_v[self._max_head]
+
+    def min(self):
+        '''
+.. method:: min()
+
+        Returns the minimum of the window, 0 if no sample was added yet.
+
+        '''
+        if not self._min_len:
+            return 0
+        return self._min_v[self._min_head]
+
+    def max(self):
+        '''
+.. method:: max()
+
+        Returns the maximum of the window, 0 if no sample was added yet.
+
+        '''
+        if not self._max_len:
+            return 0
+        return self._max_v[self._max_head]
+
+    def value(self):
+        '''
+.. method:: value()
+
+        Returns a tuple ``(min, max)`` of the window.
+
+        '''
+        return (self.min(), self.max())
+
+    def reset(self):
+        '''
+.. method:: reset()
+
+        Empties the window.
+
+        '''
+        self._seq = 0
+        self._min_head = 0
+        self._min_len = 0
+        self._max_head = 0
+        self._max_len = 0
+
+class Deadband():
+    """
+.. class:: Deadband(absolute=0, relative=0, max_interval=0, decimation=1)
+
+    Report-on-change stage. A value is reported only when it moves away from the
+    last reported value by more than the absolute or relative deadband, or when
+    *max_interval* has elapsed since the last report.
+
+    Counters of seen, reported and suppressed samples are kept in the
+    ``samples``, ``reports`` and ``suppressed`` attributes.
+
+    :param absolute: Minimum absolute change to report, 0 to disable
+    :param relative: Minimum change relative to the last reported value (0.1 is 10%), 0 to disable
+    :param max_interval: Maximum time between reports, in the unit of *now*, 0 to disable
+    :param decimation: Only one sample out of *decimation* is considered, the others are suppressed
+    """
+
+    def __init__(self, absolute=0, relative=0, max_interval=0, decimation=1):
+        self.absolute = absolute
+        self.relative = relative
+        self.max_interval = max_interval
+        self.decimation = decimation
+        self.reset()
+
+    def _moved(self, ref, value):
+        diff = abs(value - ref)
+        if self.absolute and diff > self.absolute:
+            return True
+        if self.relative and diff > abs(ref) * self.relative:
+            return True
+        return not self.absolute and not self.relative and diff != 0
+
+    def _due(self, now):
+        if self._last is None:
+            return True
+        return self.max_interval and now - self._last_time >= self.max_interval
+
+    def _skip(self):
+        self.samples += 1
+        self._phase += 1
+        if self._phase < self.decimation:
+            self.suppressed += 1
+            return True
+        self._phase = 0
+        return False
+
+    def _report(self, value, now):
+        self._last = value
+        self._last_time = now
+        self.reports += 1
+        return True
+
+    def update(self, value, now=0):
+        '''
+.. method:: update(value, now=0)
+
+        Feeds a sample to the stage.
+
+        :param value: sample value
+        :param now: current time, e.g. ``timers.now()``; only needed when *max_interval* is set
+
+        Returns True if the value must be reported.
+
+        '''
+        if self._skip():
+            return False
+        if self._due(now) or self._moved(self._last, value):
+            return self._report(value, now)
+        self.suppressed += 1
+        return False
+
+    def updateFrame(self, values, now=0):
+        '''
+.. method:: updateFrame(values, now=0)
+
+        Same as :meth:`update` for a tuple of values, such as a red, green, blue frame.
+        The frame is reported as a whole when any of its values moves beyond the deadband.
+
+        Returns True if the frame must be reported.
+
+        '''
+        if self._skip():
+            return False
+        if self._due(now):
+            return self._report(values, now)
+        last = self._last
+        for i in range(len(values)):
+            if self._moved(last[i], values[i]):
+                return self._report(values, now)
+        self.suppressed += 1
+        return False
+
+    def last(self):
+        '''
+.. method:: last()
+
+        Returns the last reported value, None if nothing was reported yet.
+
+        '''
+        return self._last
+
+    def reset(self):
+        '''
+.. method:: reset()
+
+        Forgets the last reported value and clears the counters.
+
+        '''
+        self._last = None
+        self._last_time = 0
+        self._phase = self.decimation - 1
+        self.samples = 0
+        self.reports = 0
+        self.suppressed = 0
@@ -0,0 +1,154 @@
+"""
+.. module:: flicker
+
+****************
+Flicker Module
+****************
+
+Light flicker analysis for samples captured with :meth:`SL06.captureLight`.
+
+The amplitude at each candidate frequency is measured with the Goertzel algorithm, which costs
+a few multiplications per sample and frequency and needs no sample buffer, so it can also run
+while samples are being captured. Mains powered lamps flicker at twice the mains frequency
+(100 Hz or 120 Hz); PWM dimmers are found by scanning a frequency range.
+
+    """
+
+import math
+
+class Goertzel():
+    """
+.. class:: Goertzel(freq, fs)
+
+    Streaming single-frequency DFT.
+
+    :param freq: Frequency to detect, in Hz
+    :param fs: Sampling frequency, in Hz
+    """
+
+    def __init__(self, freq, fs):
+        self.freq = freq
+        self._coeff = 2 * math.cos(2 * math.pi * freq / fs)
+        self.reset()
+
+    def reset(self):
+        '''
+.. method:: reset()
+
+        Clears the filter state.
+
+        '''
+        self._s1 = 0
+        self._s2 = 0
+        self._n = 0
+
+    def update(self, sample):
+        '''
+.. method:: update(sample)
+
+        Adds a sample.
+
+        '''
+        s0 = sample + self._coeff * self._s1 - self._s2
+        self._s2 = self._s1
+        self._s1 = s0
+        self._n += 1
+
+    def amplitude(self):
+        '''
+.. method:: amplitude()
+
+        Returns the amplitude of the sinusoid at the detector frequency over the samples added so far.
+
+        '''
+        if self._n == 0:
+            return 0
+        power = self._s1 * self._s1 + self._s2 * self._s2 - self._coeff * self._s1 * self._s2
+        if power < 0:
+            power = 0
+        return 2 * math.sqrt(power) / self._n
+
+class FlickerResult():
+    """
+.. class:: FlickerResult()
+
+    Outcome of :func:`analyze`.
+
+    * ``frequency``: dominant flicker frequency in Hz, None if no candidate exceeds the detection threshold
+    * ``amplitude``: amplitude at ``frequency`` relative to the mean level (0 to 1)
+    * ``depth``: modulation depth (percent flicker) ``(max - min) / (max + min)`` of the samples
+    * ``mean``: mean light level
+    * ``fs``: sampling frequency used, in Hz
+    * ``missed``: integrations missed during the capture, as counted by :meth:`SL06.captureLight`; the analysis assumes uniform sampling, which holds only if it is 0
+    """
+    __slots__ = ['frequency', 'amplitude', 'depth', 'mean', 'fs', 'missed']
+
+    def __init__(self):
+        self.frequency = None
+        self.amplitude = 0
+        self.depth = 0
+        self.mean = 0
+        self.fs = 0
+        self.missed = 0
+
+def analyze(samples, count, fs, frequencies=(100, 120), scan_step=0, threshold=0.02, missed=0):
+    '''
+.. function:: analyze(samples, count, fs, frequencies=(100, 120), scan_step=0, threshold=0.02, missed=0)
+
+    Looks for flicker in the first *count* samples of *samples*.
+
+    :param samples: light samples, e.g. the buffer filled by :meth:`SL06.captureLight`
+    :param count: number of samples to analyze
+    :param fs: sampling frequency in Hz, e.g. as returned by :meth:`SL06.captureLight`
+    :param frequencies: candidate flicker frequencies in Hz; frequencies at or above fs/2 are skipped
+    :param scan_step: if not 0, frequencies from *scan_step* up to fs/2 in steps of *scan_step* are also tested
+    :param threshold: minimum relative amplitude to report a flicker frequency
+    :param missed: integrations missed during the capture, copied to the result
+
+    Returns a :class:`FlickerResult`.
+
+    '''
+    res = FlickerResult()
+    res.fs = fs
+    res.missed = missed
+    if count == 0:
+        return res
+
+    lo = samples[0]
+    hi = samples[0]
+    total = 0
+    for i in range(count):
+        v = samples[i]
+        total += v
+        if v < lo:
+            lo = v
+        if v > hi:
+            hi = v
+    mean = total / count
+    res.mean = mean
+    if hi + lo > 0:
+        res.depth = (hi - lo) / (hi + lo)
+    if mean == 0:
+        return res
+
+    candidates = [f for f in frequencies if f < fs / 2]
+    if scan_step:
+        f = scan_step
+        while f < fs / 2:
+            candidates.append(f)
+            f += scan_step
+
+    best = 0
+    for f in candidates:
+        g = Goertzel(f, fs)
+        for i in range(count):
+            # remove the mean so the DC level does not leak into low bins
+            g.update(samples[i] - mean)
+        amp = g.amplitude() / mean
+        if amp > best:
+            best = amp
+            res.frequency = f
+    res.amplitude = best
+    if best < threshold:
+        res.frequency = None
+    return res
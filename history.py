@@ -0,0 +1,182 @@
+"""
+.. module:: history
+
+****************
+History Module
+****************
+
+Timestamped sample history with windowed statistics.
+
+A :class:`History` keeps the last samples of a channel in fixed-size ring buffers allocated at
+construction, and maintains the sum and two monotonic queues over a sliding time window, so
+min, max, mean and count over the window cost amortized constant time and no allocation per sample.
+
+A history can be attached to an SL06 channel with :meth:`SL06.attachFilter`: every reading is
+then recorded and returned unchanged.
+
+    """
+
+class History():
+    """
+.. class:: History(size, window, now=None)
+
+    Sliding window of timestamped samples.
+
+    :param size: Maximum number of samples kept; older samples leave the window even if they are within *window*
+    :param window: Window length, in the unit of the timestamps (e.g. ms)
+    :param now: Function returning the current timestamp, e.g. ``timers.now``; needed by :meth:`update` and by queries without an explicit time
+    """
+
+    def __init__(self, size, window, now=None):
+        self.size = size
+        self.window = window
+        self._now = now
+        self._ts = [0 for x in range(size)]
+        self._val = [0 for x in range(size)]
+        # monotonic queues of sample sequence numbers
+        self._minq = [0 for x in range(size)]
+        self._maxq = [0 for x in range(size)]
+        self.reset()
+
+    def reset(self):
+        '''
+.. method:: reset()
+
+        Removes all the samples.
+
+        '''
+        self._start = 0     # sequence number of the oldest sample in the window
+        self._next = 0      # sequence number of the next sample
+        self._sum = 0
+        self._min_head = 0
+        self._min_len = 0
+        self._max_head = 0
+        self._max_len = 0
+
+    def _evict(self, oldest):
+        # drop samples with sequence number below oldest, or older than the window
+        size = self.size
+        while self._start < self._next and (self._start < oldest or self._ts[self._start % size] < self._limit):
+            self._sum -= self._val[self._start % size]
+            if self._min_len and self._minq[self._min_head] == self._start:
+                self._min_head = (self._min_head + 1) % size
+                self._min_len -= 1
+            if self._max_len and self._maxq[self._max_head] == self._start:
+                self._max_head = (self._max_head + 1) % size
+                self._max_len -= 1
+            self._start += 1
+
+    def _expire(self, now):
+        if now is None:
+            if self._now is None:
+                return
+            now = self._now()
+        self._limit = now - self.window
+        self._evict(0)
+
+    def add(self, value, ts):
+        '''
+.. method:: add(value, ts)
+
+        Records a sample. Timestamps must not decrease.
+
+        :param value: sample value
+        :param ts: sample timestamp
+
+        '''
+        size = self.size
+        seq = self._next
+        self._limit = ts - self.window
+        self._evict(seq - size + 1)
+
+        pos = seq % size
+        self._ts[pos] = ts
+        self._val[pos] = value
+        self._sum += value
+        self._next = seq + 1
+
+        while self._min_len:
+            tail = (self._min_head + self._min_len - 1) % size
+            if self._val[self._minq[tail] % size] < value:
+                break
+            self._min_len -= 1
+        self._minq[(self._min_head + self._min_len) % size] = seq
+        self._min_len += 1
+
+        while self._max_len:
+            tail = (self._max_head + self._max_len - 1) % size
+            if self._val[self._maxq[tail] % size] > value:
+                break
+            self._max_len -= 1
+        self._maxq[(self._max_head + self._max_len) % size] = seq
+        self._max_len += 1
+
+    def update(self, value):
+        '''
+.. method:: update(value)
+
+        Records a sample at the current time, as given by the *now* function.
+
+        Returns *value* unchanged, so the history can be attached to an SL06 channel.
+
+        '''
+        self.add(value, self._now())
+        return value
+
+    def count(self, now=None):
+        '''
+.. method:: count(now=None)
+
+        Returns the number of samples in the window ending at *now* (default: current time, or the last sample if no *now* function was given).
+
+        '''
+        self._expire(now)
+        return self._next - self._start
+
+    def mean(self, now=None):
+        '''
+.. method:: mean(now=None)
+
+        Returns the mean of the samples in the window, None if it is empty.
+
+        '''
+        self._expire(now)
+        if self._next == self._start:
+            return None
+        return self._sum / (self._next - self._start)
+
+    def min(self, now=None):
+        '''
+.. method:: min(now=None)
+
+        Returns the minimum of the samples in the window, None if it is empty.
+
+        '''
+        self._expire(now)
+        if not self._min_len:
+            return None
+        return self._val[self._minq[self._min_head] % self.size]
+
+    def max(self, now=None):
+        '''
+.. method:: max(now=None)
+
+        Returns the maximum of the samples in the window, None if it is empty.
+
+        '''
+        self._expire(now)
+        if not self._max_len:
+            return None
+        return self._val[self._maxq[self._max_head] % self.size]
+
+    def last(self):
+        '''
+.. method:: last()
+
+        Returns a tuple (timestamp, value) of the most recent sample, None if there is none.
+
+        '''
+        if self._next == self._start:
+            return None
+        pos = (self._next - 1) % self.size
+        return (self._ts[pos], self._val[pos])
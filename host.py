@@ -0,0 +1,73 @@
+"""
+.. module:: host
+
+*************
+Host Module
+*************
+
+Stand-ins for the Zerynth VM modules and builtins used by :mod:`sl06`, so that the driver runs on a
+host (CPython) with a backend from the :mod:`bus` module. Import it before :mod:`sl06`::
+
+    import host
+    import bus
+    import sl06
+
+    sensor = sl06.SL06(bus=bus.LinuxBus(1))
+
+The import installs the ``i2c`` and ``timers`` modules and the ``sleep``, ``new_exception``,
+``PeripheralError``, ``InvalidIdError`` and ``I2C0`` builtins; names that already exist are left alone.
+The ``i2c`` stand-in has no driver, so :class:`sl06.SL06` must be given a *bus*.
+
+This module is for the host only: on Zerynth the real modules and builtins are resolved when the
+driver is compiled.
+
+    """
+
+import builtins
+import sys
+import time
+import types
+
+class InvalidIdError(ValueError):
+    pass
+
+def _i2c_driver(drvname, addr=0x39, clk=100000):
+    raise PeripheralError('no i2c driver on the host: pass a bus backend to SL06')
+
+def _now():
+    return int(time.monotonic() * 1000)
+
+def _sleep(ms):
+    time.sleep(ms / 1000)
+
+def _new_exception(name, parent, msg=''):
+    # on the VM this declares *name*; here the exceptions are defined in advance
+    pass
+
+def install():
+    '''
+.. function:: install()
+
+    Installs the stand-ins. Called on import; calling it again has no effect.
+
+    '''
+    if 'i2c' not in sys.modules:
+        mod = types.ModuleType('i2c')
+        mod.I2C = _i2c_driver
+        sys.modules['i2c'] = mod
+    if 'timers' not in sys.modules:
+        mod = types.ModuleType('timers')
+        mod.now = _now
+        sys.modules['timers'] = mod
+    names = {
+        'sleep': _sleep,
+        'new_exception': _new_exception,
+        'PeripheralError': OSError,
+        'InvalidIdError': InvalidIdError,
+        'I2C0': 0,
+    }
+    for name in names:
+        if not hasattr(builtins, name):
+            setattr(builtins, name, names[name])
+
+install()
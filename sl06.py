@@ -9,6 +9,11 @@ This is a module for the `SL06 <https://wiki.xinabox.cc/SL06_-_Gesture/>`_ Digit
 The board is based off the APDS-9960 manufactured by Avago Technologies.
 The board uses I2C for communication.
 
+Register access goes through a small bus interface (``write_read(reg, n)`` and ``write_bytes(reg, *data)``).
+On Zerynth the default :class:`I2CBus` backend wraps the ``i2c`` driver; the :mod:`bus` module provides
+a Linux ``/dev/i2c-*`` backend and an in-memory fake, so the same driver runs on a host once the
+:mod:`host` module has installed stand-ins for the Zerynth builtins.
+
 Data Sheets:
 
 - `APDS-9960 <https://docs.broadcom.com/docs/AV02-4191EN>`_
@@ -16,12 +21,21 @@ Data Sheets:
     """
 
 import i2c
+import timers
+import threading
 
 # Gesture parameters #
 GESTURE_THRESHOLD_OUT   = 10
 GESTURE_SENSITIVITY_1   = 50
 GESTURE_SENSITIVITY_2   = 20
 
+# Fixed-point U/D and L/R ratios: percent * GESTURE_RATIO_ONE #
+# 4096 keeps the ratios of different readings distinct and fits in 28 bits #
+GESTURE_RATIO_ONE       = 4096
+GESTURE_RATIO_SCALE     = 100 * GESTURE_RATIO_ONE
+GESTURE_SENSITIVITY_1_FX = GESTURE_SENSITIVITY_1 * GESTURE_RATIO_ONE
+GESTURE_SENSITIVITY_2_FX = GESTURE_SENSITIVITY_2 * GESTURE_RATIO_ONE
+
 # Error code for returned values #
 ERROR                   = 0xFF
 
@@ -31,6 +45,12 @@ APDS9960_ID_2           = 0x9C
 
 # Misc parameters #
 FIFO_PAUSE_TIME         = 30      # Wait period (ms) between FIFO reads
+CLOCK_RATES             = (400000, 200000, 100000)  # Bus clock speeds tried by probeClock
+STARTUP_TIME            = 6       # Time (ms) from power on to the first engine cycle (5.7ms)
+GESTURE_MIN_DATASETS    = 5       # Datasets needed by processGestureData
+GESTURE_READ_DATASETS   = 8       # Datasets per FIFO read targeted by adaptive pauses
+GESTURE_FIFO_HIGH       = 24      # FIFO level considered close to overflow
+ALS_CYCLE_COUNTS        = 1025    # Full scale of the ALS channels per 2.78ms integration cycle
 
 # APDS-9960 register addresses #
 APDS9960_ENABLE         = 0x80
@@ -91,7 +111,16 @@ APDS9960_WEN            = 0b00001000
 APSD9960_AIEN           = 0b00010000
 APDS9960_PIEN           = 0b00100000
 APDS9960_GEN            = 0b01000000
+APDS9960_AVALID         = 0b00000001
+APDS9960_PVALID         = 0b00000010
+APDS9960_GINT           = 0b00000100
+APDS9960_AINT           = 0b00010000
+APDS9960_PINT           = 0b00100000
+APDS9960_PGSAT          = 0b01000000
+APDS9960_CPSAT          = 0b10000000
 APDS9960_GVALID         = 0b00000001
+APDS9960_GFOV           = 0b00000010
+APDS9960_GFIFO_CLR      = 0b00000100
 
 # On/Off definitions #
 OFF                     = 0
@@ -147,6 +176,15 @@ GWTIME_22_4MS           = 5
 GWTIME_30_8MS           = 6
 GWTIME_39_2MS           = 7
 
+# Gesture wait times in us, indexed by GWTIME #
+GWTIME_US = (0, 2800, 5600, 8400, 14000, 22400, 30800, 39200)
+
+# Gesture pulse lengths in us, indexed by GPLEN #
+GPLEN_US = (4, 8, 16, 32)
+
+# Datasets needed for GVALID, indexed by GFIFOTH #
+GFIFOTH_DATASETS = (1, 4, 8, 16)
+
 # Default values #
 DEFAULT_ATIME           = 219     # 103ms
 DEFAULT_WTIME           = 246     # 27ms
@@ -187,6 +225,82 @@ DIR_NEAR    = 'near'
 DIR_FAR     = 'far'
 DIR_ALL     = 'all'
 
+# Swipe direction for each (gesture_ud_count_, gesture_lr_count_) pair, indexed by ud * 3 + lr + 4: #
+# (direction if the U/D delta is stronger, direction otherwise), None for no swipe #
+GESTURE_DIRECTIONS = (
+    (DIR_UP, DIR_LEFT),     (DIR_UP, DIR_UP),       (DIR_UP, DIR_RIGHT),
+    (DIR_LEFT, DIR_LEFT),   None,                   (DIR_RIGHT, DIR_RIGHT),
+    (DIR_DOWN, DIR_LEFT),   (DIR_DOWN, DIR_DOWN),   (DIR_DOWN, DIR_RIGHT),
+)
+
+# Channel definitions, used by attachFilter #
+CHANNEL_CLEAR           = 0
+CHANNEL_RED             = 1
+CHANNEL_GREEN           = 2
+CHANNEL_BLUE            = 3
+CHANNEL_PROXIMITY       = 4
+
+# Register fields, name: (register, shift, width) #
+# A width of 16 spans the register and the next one, low byte first.
+FIELDS = {
+    # whole registers
+    'enable':       (APDS9960_ENABLE, 0, 8),
+    'atime':        (APDS9960_ATIME, 0, 8),
+    'wtime':        (APDS9960_WTIME, 0, 8),
+    'ailt':         (APDS9960_AILTL, 0, 16),
+    'aiht':         (APDS9960_AIHTL, 0, 16),
+    'pilt':         (APDS9960_PILT, 0, 8),
+    'piht':         (APDS9960_PIHT, 0, 8),
+    'pers':         (APDS9960_PERS, 0, 8),
+    'config1':      (APDS9960_CONFIG1, 0, 8),
+    'ppulse':       (APDS9960_PPULSE, 0, 8),
+    'config2':      (APDS9960_CONFIG2, 0, 8),
+    'poffset_ur':   (APDS9960_POFFSET_UR, 0, 8),
+    'poffset_dl':   (APDS9960_POFFSET_DL, 0, 8),
+    'config3':      (APDS9960_CONFIG3, 0, 8),
+    'gpenth':       (APDS9960_GPENTH, 0, 8),
+    'gexth':        (APDS9960_GEXTH, 0, 8),
+    'gconf1':       (APDS9960_GCONF1, 0, 8),
+    'goffset_u':    (APDS9960_GOFFSET_U, 0, 8),
+    'goffset_d':    (APDS9960_GOFFSET_D, 0, 8),
+    'goffset_l':    (APDS9960_GOFFSET_L, 0, 8),
+    'goffset_r':    (APDS9960_GOFFSET_R, 0, 8),
+    'gpulse':       (APDS9960_GPULSE, 0, 8),
+    'gconf3':       (APDS9960_GCONF3, 0, 8),
+    # ENABLE
+    'pon':          (APDS9960_ENABLE, 0, 1),
+    'aen':          (APDS9960_ENABLE, 1, 1),
+    'pen':          (APDS9960_ENABLE, 2, 1),
+    'wen':          (APDS9960_ENABLE, 3, 1),
+    'aien':         (APDS9960_ENABLE, 4, 1),
+    'pien':         (APDS9960_ENABLE, 5, 1),
+    'gen':          (APDS9960_ENABLE, 6, 1),
+    # PERS
+    'ppers':        (APDS9960_PERS, 4, 4),
+    'apers':        (APDS9960_PERS, 0, 4),
+    # CONTROL
+    'ldrive':       (APDS9960_CONTROL, 6, 2),
+    'pgain':        (APDS9960_CONTROL, 2, 2),
+    'again':        (APDS9960_CONTROL, 0, 2),
+    # CONFIG2
+    'led_boost':    (APDS9960_CONFIG2, 4, 2),
+    # CONFIG3
+    'pcmp':         (APDS9960_CONFIG3, 5, 1),
+    'prox_mask':    (APDS9960_CONFIG3, 0, 4),
+    # GCONF2
+    'ggain':        (APDS9960_GCONF2, 5, 2),
+    'gldrive':      (APDS9960_GCONF2, 3, 2),
+    'gwtime':       (APDS9960_GCONF2, 0, 3),
+    # GCONF4
+    'gien':         (APDS9960_GCONF4, 1, 1),
+    'gmode':        (APDS9960_GCONF4, 0, 1),
+}
+
+# Event kinds, used by poll #
+EVENT_LIGHT             = 0
+EVENT_PROXIMITY         = 1
+EVENT_GESTURE           = 2
+
 # State definitions #
 NA_STATE1     = 'na_state1'
 NEAR_STATE1   = 'near_state1'
@@ -206,29 +320,234 @@ class gestureDataType():
         self.in_threshold = 0
         self.out_threshold = 0
 
-class SL06(i2c.I2C):
+class GestureResult():
+    """
+.. class:: GestureResult()
+
+    Detailed outcome of a gesture, returned by :meth:`SL06.getGesture` when called with ``detail=True``.
+
+    * ``direction``: gesture direction, one of the DIR_* strings
+    * ``confidence``: 0 to 1, strength of the accumulated up/down or left/right delta; 0.5 is exactly ``GESTURE_SENSITIVITY_1``
+    * ``ud_delta``, ``lr_delta``: accumulated up/down and left/right ratio deltas, in percent
+    * ``duration``: time in ms taken by the sensor to produce the FIFO datasets of the gesture, ``datasets`` times the gesture engine cycle
+    * ``speed``: dominant delta per second, a relative swipe speed
+    * ``datasets``: number of FIFO datasets read for the gesture
+    * ``latency``: time in ms spent inside :meth:`SL06.getGesture`
+    """
+    __slots__ = ['direction', 'confidence', 'ud_delta', 'lr_delta', 'duration', 'speed', 'datasets', 'latency']
+
+    def __init__(self):
+        self.direction = DIR_NONE
+        self.confidence = 0
+        self.ud_delta = 0
+        self.lr_delta = 0
+        self.duration = 0
+        self.speed = 0
+        self.datasets = 0
+        self.latency = 0
+
+class GestureStats():
+    """
+.. class:: GestureStats()
+
+    Per-stage profile of :meth:`SL06.getGesture`, enabled with :meth:`SL06.enableGestureStats`.
+    Times are in ms, with the resolution of the system clock.
+
+    * ``gestures``: number of processed gestures
+    * ``iterations``: total FIFO loop iterations; ``max_iterations``: most iterations for one gesture
+    * ``sleep_time``: time spent in FIFO pauses
+    * ``bus_time``: time spent reading GSTATUS, GFLVL and the FIFO
+    * ``decode_time``: time spent sorting datasets, in processGestureData and decodeGesture
+    * ``total_time``: total time spent in getGesture for the processed gestures
+    * ``fifo_levels``: list of 33 counters, how many FIFO reads found each FIFO level
+    """
+    __slots__ = ['gestures', 'iterations', 'max_iterations', 'sleep_time', 'bus_time', 'decode_time', 'total_time', 'fifo_levels', '_iterations_start']
+
+    def __init__(self):
+        self.gestures = 0
+        self.iterations = 0
+        self.max_iterations = 0
+        self.sleep_time = 0
+        self.bus_time = 0
+        self.decode_time = 0
+        self.total_time = 0
+        self.fifo_levels = [0 for x in range(33)]
+        self._iterations_start = 0
+
+    def iterationsPerGesture(self):
+        '''
+.. method:: iterationsPerGesture()
+
+        Returns the mean number of FIFO loop iterations per gesture.
+
+        '''
+        if self.gestures == 0:
+            return 0
+        return self.iterations / self.gestures
+
+class SensorFrame():
+    """
+.. class:: SensorFrame(data, full_scale=65535)
+
+    Light, colour and proximity readings taken in one transaction together with the STATUS register,
+    returned by :meth:`SL06.getFrame`.
+
+    * ``clear``, ``red``, ``green``, ``blue``: colour channel counts
+    * ``proximity``: proximity level
+    * ``status``: raw STATUS register
+    * ``als_valid``: True if the ALS engine completed an integration
+    * ``prox_valid``: True if the proximity engine completed a measurement
+    * ``als_saturated``: True if the clear photodiode saturated (CPSAT) or the clear count reached the digital full scale
+    * ``prox_saturated``: True if the proximity measurement was saturated by ambient light (PGSAT)
+
+    The digital full scale of the colour channels is ``min(65535, 1025 * (256 - ATIME))``, see :meth:`SL06.getAlsFullScale`.
+    """
+    __slots__ = ['clear', 'red', 'green', 'blue', 'proximity', 'status', 'als_valid', 'prox_valid', 'als_saturated', 'prox_saturated']
+
+    def __init__(self, data, full_scale=65535):
+        status = data[0]
+        self.status = status
+        self.clear = data[1] | (data[2] << 8)
+        self.red = data[3] | (data[4] << 8)
+        self.green = data[5] | (data[6] << 8)
+        self.blue = data[7] | (data[8] << 8)
+        self.proximity = data[9]
+        self.als_valid = (status & APDS9960_AVALID) != 0
+        self.prox_valid = (status & APDS9960_PVALID) != 0
+        self.als_saturated = (status & APDS9960_CPSAT) != 0 or self.clear >= full_scale
+        self.prox_saturated = (status & APDS9960_PGSAT) != 0
+
+    def isValid(self):
+        '''
+.. method:: isValid()
+
+        Returns True if both engines produced data and none of them is saturated.
+
+        '''
+        return self.als_valid and self.prox_valid and not self.als_saturated and not self.prox_saturated
+
+class I2CBus():
+    """
+.. class:: I2CBus(drvname, addr=0x39, clk=100000)
+
+    Bus backend for the Zerynth ``i2c`` driver, used by default by :class:`SL06`.
+
+    :param drvname: I2C Bus used '( I2C0, ... )'
+    :param addr: Slave address, default 0x39
+    :param clk: Clock speed, default 100kHz
+    """
+
+    def __init__(self, drvname, addr=0x39, clk=100000):
+        self.drvname = drvname
+        self.addr = addr
+        self.clk = clk
+        self.port = i2c.I2C(drvname, addr, clk)
+        try:
+            self.port.start()
+        except PeripheralError as e:
+            print(e)
+
+    def write_read(self, reg, n):
+        return self.port.write_read(reg, n)
+
+    def write_bytes(self, reg, *data):
+        self.port.write_bytes(reg, *data)
+
+    def setClock(self, clk):
+        '''
+.. method:: setClock(clk)
+
+        Restarts the I2C peripheral with clock speed *clk*.
+        Exception raised if unsuccessful.
+
+        '''
+        self.port.stop()
+        self.port = i2c.I2C(self.drvname, self.addr, clk)
+        self.port.start()
+        self.clk = clk
+
+class Event():
+    """
+.. class:: Event()
+
+    Event dispatched by :meth:`SL06.poll`.
+
+    * ``kind``: EVENT_LIGHT, EVENT_PROXIMITY or EVENT_GESTURE
+    * ``value``: (clear, red, green, blue) tuple, proximity level or gesture direction
+    * ``frame``: the :class:`SensorFrame` read by the poll (None for gestures)
+    """
+    __slots__ = ['kind', 'value', 'frame']
+
+    def __init__(self, kind, value, frame):
+        self.kind = kind
+        self.value = value
+        self.frame = frame
+
+class SelfTestReport():
+    """
+.. class:: SelfTestReport()
+
+    Outcome of :meth:`SL06.selfTest`. Times are in ms, latencies in us.
+
+    * ``device_id``: value of the ID register; ``id_ok``: True if it is a known APDS-9960 ID
+    * ``int_line``: True if the INT line was released, asserted by IFORCE and released again by clearing; None if not checked
+    * ``als_time``, ``prox_time``, ``gesture_time``: time until each engine signalled valid data (AVALID, PVALID, GVALID), None if it did not within its limit
+    * ``als_limit``, ``prox_limit``, ``gesture_limit``: the limits, derived from the configured integration times
+    * ``single_latency``: mean round trip of a one byte register read
+    * ``burst_latency``: mean round trip of a burst read of ``burst_size`` bytes
+    * ``passed``: True if all the checks succeeded
+    """
+    __slots__ = ['device_id', 'id_ok', 'int_line', 'als_time', 'prox_time', 'gesture_time', 'als_limit', 'prox_limit', 'gesture_limit',
+                 'single_latency', 'burst_latency', 'burst_size', 'passed']
+
+    def __init__(self):
+        self.device_id = 0
+        self.id_ok = False
+        self.int_line = None
+        self.als_time = None
+        self.prox_time = None
+        self.gesture_time = None
+        self.als_limit = 0
+        self.prox_limit = 0
+        self.gesture_limit = 0
+        self.single_latency = 0
+        self.burst_latency = 0
+        self.burst_size = 0
+        self.passed = False
+
+class SL06():
     """
     
 ===============
  SL06 class
 ===============
 
-.. class:: SL06(drvname, addr=0x39, clk=100000)
+.. class:: SL06(drvname, addr=0x39, clk=100000, bus=None, clock=None)
 
     Creates an intance of the SL06 class.
 
     :param drvname: I2C Bus used '( I2C0, ... )'
     :param addr: Slave address, default 0x39
-    :param clk: Clock speed, default 100kHz
+    :param clk: Clock speed, default 100kHz; :meth:`probeClock` selects the fastest speed the wiring supports
+    :param bus: Bus backend, e.g. ``bus.LinuxBus(1)``; *drvname* and *clk* are ignored when given. Defaults to an :class:`I2CBus` on *drvname*
+    :param clock: Object with ``now()`` (ms) and ``sleep(ms)`` methods used for all the driver timing, e.g. ``bus.VirtualClock()``. Defaults to ``timers.now()`` and ``sleep()``
+
+    Bus access is serialized by an internal lock, so an instance can be shared between threads.
+    Register read-modify-write cycles, FIFO drains and multi-byte reads are atomic.
     """
 
-    def __init__(self, drvname=I2C0, addr=0x39 , clk=100000):
-        i2c.I2C.__init__(self, drvname, addr, clk)
+    def __init__(self, drvname=I2C0, addr=0x39 , clk=100000, bus=None, clock=None):
+        if bus is None:
+            bus = I2CBus(drvname, addr, clk)
+        self.bus = bus
+        if clock is None:
+            self._now = timers.now
+            self._sleep = sleep
+        else:
+            self._now = clock.now
+            self._sleep = clock.sleep
+        self._lock = threading.Lock()
         self._addr = addr
-        try:
-            self.start()
-        except PeripheralError as e:
-            print(e)
 
         self.gesture_ud_delta_ = 0
         self.gesture_lr_delta_ = 0
@@ -239,15 +558,57 @@ class SL06(i2c.I2C):
         self.gesture_state_ = 0
         self.gesture_motion_ = DIR_NONE
         self.gesture_data_= gestureDataType()
+        self.gesture_datasets_ = 0
+        self.gesture_latency_ = 0
+        self.gesture_adaptive_ = False
+        self.gesture_early_commit_ = 0
+        self.gesture_cycle_ = None
+        self.gesture_stats_ = None
+        self.gesture_overflows_ = 0
+        self.gesture_dropped_ = 0
+        self._filters = [None, None, None, None, None]
+        self._handlers = [None, None, None]
+        self._light_band = None
+        self._light_min = 0
+        self._als_full_scale = None
             
-    def init(self):
+    def write_read(self, reg, n):
+        self._lock.acquire()
+        try:
+            return self.bus.write_read(reg, n)
+        finally:
+            self._lock.release()
+
+    def write_bytes(self, reg, *data):
+        self._lock.acquire()
+        try:
+            self.bus.write_bytes(reg, *data)
+        finally:
+            self._lock.release()
+
+    def _update(self, reg, mask, val):
+        # atomic read-modify-write of the bits of reg selected by mask
+        self._lock.acquire()
+        try:
+            cur = self.bus.write_read(reg, 1)[0]
+            self.bus.write_bytes(reg, (cur & ~mask) | (val & mask))
+        finally:
+            self._lock.release()
+
+    def _read16(self, reg):
+        data = self.write_read(reg, 2)
+        return data[0] | (data[1] << 8)
+
+    def init(self, config=None):
         '''
-.. method:: init()
+.. method:: init(config=None)
 
         Configures APDS-9960 by initializing registers to its default values.
         Call immediately after instantiating the SL06 class.
         Raises an exeption if any error occurs during initialization.
 
+        :param config: Optional dict of register fields (names as in ``FIELDS``) applied instead of the defaults, e.g. a stored calibration from :func:`calibration.load`. The registers are still written in a single pass
+
         Returns True if initialization is successful.
 
         '''
@@ -257,42 +618,308 @@ class SL06(i2c.I2C):
             raise InvalidIdError
         
         # set registers to default
+        fields = dict(enable=0, wtime=DEFAULT_WTIME, ppulse=DEFAULT_PROX_PPULSE,
+                poffset_ur=DEFAULT_POFFSET_UR, poffset_dl=DEFAULT_POFFSET_DL, config1=DEFAULT_CONFIG1,
+                ldrive=DEFAULT_LDRIVE, pgain=DEFAULT_PGAIN, again=DEFAULT_AGAIN,
+                pilt=DEFAULT_PILT, piht=DEFAULT_PIHT, ailt=DEFAULT_AILT, aiht=DEFAULT_AIHT,
+                pers=DEFAULT_PERS, config2=DEFAULT_CONFIG2, config3=DEFAULT_CONFIG3,
+                gpenth=DEFAULT_GPENTH, gexth=DEFAULT_GEXTH, gconf1=DEFAULT_GCONF1,
+                ggain=DEFAULT_GGAIN, gldrive=DEFAULT_GLDRIVE, gwtime=DEFAULT_GWTIME,
+                goffset_u=DEFAULT_GOFFSET, goffset_d=DEFAULT_GOFFSET, goffset_l=DEFAULT_GOFFSET,
+                goffset_r=DEFAULT_GOFFSET, gpulse=DEFAULT_GPULSE, gconf3=DEFAULT_GCONF3,
+                gien=DEFAULT_GIEN)
+        if config:
+            for name in config:
+                fields[name] = config[name]
         try:
-            self.setMode(ALL, OFF)
-            self.write_bytes(APDS9960_WTIME, DEFAULT_WTIME)
-            self.write_bytes(APDS9960_PPULSE, DEFAULT_PROX_PPULSE)
-            self.write_bytes(APDS9960_POFFSET_UR, DEFAULT_POFFSET_UR)
-            self.write_bytes(APDS9960_POFFSET_DL, DEFAULT_POFFSET_DL)
-            self.write_bytes(APDS9960_CONFIG1, DEFAULT_CONFIG1)
-            self.setLEDDrive(DEFAULT_LDRIVE)
-            self.setProximityGain(DEFAULT_PGAIN)
-            self.setAmbientLightGain(DEFAULT_AGAIN)
-            self.setProxIntLowThresh(DEFAULT_PILT)
-            self.setProxIntHighThresh(DEFAULT_PIHT)
-            self.setLightIntLowThreshold(DEFAULT_AILT)
-            self.setLightIntHighThreshold(DEFAULT_AIHT)
-            self.write_bytes(APDS9960_PERS, DEFAULT_PERS)
-            self.write_bytes(APDS9960_CONFIG2, DEFAULT_CONFIG2)
-            self.write_bytes(APDS9960_CONFIG3, DEFAULT_CONFIG3)
-            self.setGestureEnterThresh(DEFAULT_GPENTH)
-            self.setGestureExitThresh(DEFAULT_GEXTH)
-            self.write_bytes(APDS9960_GCONF1, DEFAULT_GCONF1)
-            self.setGestureGain(DEFAULT_GGAIN)
-            self.setGestureLEDDrive(DEFAULT_GLDRIVE)
-            self.setGestureWaitTime(DEFAULT_GWTIME)
-            self.write_bytes(APDS9960_GOFFSET_U, DEFAULT_GOFFSET)
-            self.write_bytes(APDS9960_GOFFSET_D, DEFAULT_GOFFSET)
-            self.write_bytes(APDS9960_GOFFSET_L, DEFAULT_GOFFSET)
-            self.write_bytes(APDS9960_GOFFSET_R, DEFAULT_GOFFSET)
-            self.write_bytes(APDS9960_GPULSE, DEFAULT_GPULSE)
-            self.write_bytes(APDS9960_GCONF3, DEFAULT_GCONF3)
-            self.setGestureIntEnable(DEFAULT_GIEN)
-        
+            self.configure(**fields)
         except Exception as e:
             print(e)
             raise e
         return True
 
+    def getConfig(self, names):
+        '''
+.. method:: getConfig(names)
+
+        Reads several register fields with a single burst read of the register range they span,
+        e.g. to store a calibration with :func:`calibration.save`.
+        Raises ValueError on unknown field names.
+
+        :param names: field names, as in ``FIELDS``
+
+        Returns a dict of field values.
+
+        '''
+        first = 0xFF
+        last = 0
+        for name in names:
+            if name not in FIELDS:
+                raise ValueError
+            reg, shift, width = FIELDS[name]
+            if reg < first:
+                first = reg
+            if width == 16:
+                reg += 1
+            if reg > last:
+                last = reg
+        data = self.write_read(first, last - first + 1)
+
+        fields = {}
+        for name in names:
+            reg, shift, width = FIELDS[name]
+            if width == 16:
+                fields[name] = data[reg - first] | (data[reg - first + 1] << 8)
+            else:
+                fields[name] = (data[reg - first] >> shift) & ((1 << width) - 1)
+        return fields
+
+    def selfTest(self, read_int=None, repeat=20):
+        '''
+.. method:: selfTest(read_int=None, repeat=20)
+
+        Checks the sensor and its wiring, for use on a configured sensor (e.g. after :meth:`init`):
+
+        * the device ID
+        * the INT line: it must be high, go low when an interrupt is forced with IFORCE and go high again when interrupts are cleared
+        * the ALS, proximity and gesture engines, one at a time: each must signal valid data within twice its cycle time from power on
+        * the bus latency of single and burst register reads, averaged over *repeat* reads
+
+        The engines and the gesture mode are restored afterwards, interrupt flags and the gesture FIFO are cleared.
+        Exception raised on bus errors.
+
+        :param read_int: Function returning the level of the INT line, e.g. ``lambda: digitalRead(D2)``; the line is not checked if None
+        :param repeat: Number of reads for each latency measurement
+
+        Returns a :class:`SelfTestReport`.
+
+        '''
+        report = SelfTestReport()
+        report.device_id = self.write_read(APDS9960_ID, 1)[0]
+        report.id_ok = report.device_id == APDS9960_ID_1 or report.device_id == APDS9960_ID_2
+        if not report.id_ok:
+            return report
+
+        cfg = self.getConfig(('enable', 'atime', 'ppulse', 'gconf1', 'gmode'))
+        try:
+            self.configure(enable=APDS9960_PON, gmode=0)
+            self._sleep(STARTUP_TIME)
+
+            if read_int is not None:
+                self.write_read(APDS9960_CICLEAR, 1)
+                self._sleep(1)
+                released = read_int()
+                self.write_bytes(APDS9960_IFORCE, 0)
+                self._sleep(1)
+                forced = read_int()
+                self.write_read(APDS9960_CICLEAR, 1)
+                self._sleep(1)
+                report.int_line = bool(released) and not forced and bool(read_int())
+
+            # ALS integration time is (256 - ATIME) * 2.78ms
+            report.als_limit = 2 * ((256 - cfg['atime']) * 278 + 99) // 100 + STARTUP_TIME
+            report.als_time = self._testEngine(APDS9960_PON | APDS9960_AEN, 0, APDS9960_STATUS, APDS9960_AVALID, report.als_limit)
+
+            ppulse = cfg['ppulse']
+            prox_us = ((ppulse & 0b00111111) + 1) * GPLEN_US[ppulse >> 6] + 500
+            report.prox_limit = 2 * (prox_us + 999) // 1000 + STARTUP_TIME
+            report.prox_time = self._testEngine(APDS9960_PON | APDS9960_PEN, 0, APDS9960_STATUS, APDS9960_PVALID, report.prox_limit)
+
+            datasets = GFIFOTH_DATASETS[cfg['gconf1'] >> 6]
+            report.gesture_limit = 2 * (datasets * self._gestureCycleTime() + 999) // 1000 + STARTUP_TIME
+            report.gesture_time = self._testEngine(APDS9960_PON | APDS9960_PEN | APDS9960_GEN, 1, APDS9960_GSTATUS, APDS9960_GVALID, report.gesture_limit)
+        finally:
+            self.configure(enable=cfg['enable'], gmode=cfg['gmode'])
+            self._update(APDS9960_GCONF4, APDS9960_GFIFO_CLR, APDS9960_GFIFO_CLR)
+            self.write_read(APDS9960_CICLEAR, 1)
+
+        t = self._now()
+        for i in range(repeat):
+            self.write_read(APDS9960_ID, 1)
+        report.single_latency = (self._now() - t) * 1000 // repeat
+        # 32 bytes, as a full gesture FIFO drain of 8 datasets
+        report.burst_size = 32
+        t = self._now()
+        for i in range(repeat):
+            self.write_read(APDS9960_ENABLE, report.burst_size)
+        report.burst_latency = (self._now() - t) * 1000 // repeat
+
+        report.passed = (report.int_line is not False and report.als_time is not None
+                         and report.prox_time is not None and report.gesture_time is not None)
+        return report
+
+    def probeClock(self, rates=CLOCK_RATES, reads=16):
+        '''
+.. method:: probeClock(rates=CLOCK_RATES, reads=16)
+
+        Selects the fastest bus clock speed that works reliably with the board wiring.
+        Each speed in *rates*, fastest first, is tried with *reads* verified transactions: a burst read of
+        the configuration registers and the ID, compared with a reference read at the current speed, and a
+        burst write of test patterns to the ALS thresholds, read back. The first speed without errors
+        is kept; on errors the next one is tried, and if none works the current speed is restored.
+        The ALS thresholds are restored at the end. The ALS interrupt is disabled during the probe, so the
+        test patterns do not assert the INT line, and an ALS interrupt they raised is cleared; one already
+        pending before the probe is kept. The bus is locked during the probe.
+        Needs a bus backend with a ``setClock`` method and a ``clk`` attribute, such as :class:`I2CBus`.
+
+        :param rates: clock speeds to try, in Hz, fastest first
+        :param reads: verified transactions per speed
+
+        Returns the selected speed, which the backend keeps in its ``clk`` attribute, or None if the bus speed cannot be changed.
+
+        '''
+        try:
+            set_clock = self.bus.setClock
+            start = self.bus.clk
+        except AttributeError:
+            return None
+        bus = self.bus
+        self._lock.acquire()
+        try:
+            # ENABLE to ID: configuration registers, constant while probing
+            ref = bus.write_read(APDS9960_ENABLE, APDS9960_ID - APDS9960_ENABLE + 1)
+            if ref[APDS9960_ID - APDS9960_ENABLE] != APDS9960_ID_1 and ref[APDS9960_ID - APDS9960_ENABLE] != APDS9960_ID_2:
+                raise InvalidIdError
+            thresholds = ref[APDS9960_AILTL - APDS9960_ENABLE:APDS9960_AIHTH - APDS9960_ENABLE + 1]
+            enable = ref[0]
+            pending = bus.write_read(APDS9960_STATUS, 1)[0] & APDS9960_AINT
+            if enable & APSD9960_AIEN:
+                # the test patterns must not assert the INT line
+                bus.write_bytes(APDS9960_ENABLE, enable & ~APSD9960_AIEN)
+                ref = bytes((enable & ~APSD9960_AIEN,)) + ref[1:]
+            chosen = None
+            for rate in rates:
+                try:
+                    set_clock(rate)
+                    if self._verifyBus(ref, reads):
+                        chosen = rate
+                        break
+                except Exception:
+                    pass
+            if chosen is None:
+                chosen = start
+                set_clock(start)
+            bus.write_bytes(APDS9960_AILTL, thresholds[0], thresholds[1], thresholds[2], thresholds[3])
+            if not pending:
+                bus.write_read(APDS9960_AICLEAR, 1)
+            if enable & APSD9960_AIEN:
+                bus.write_bytes(APDS9960_ENABLE, enable)
+        finally:
+            self._lock.release()
+        return chosen
+
+    def _verifyBus(self, ref, reads):
+        bus = self.bus
+        ref = bytearray(ref)
+        patterns = (0x55, 0xAA, 0x0F, 0xF0)
+        for i in range(reads):
+            if bus.write_read(APDS9960_ENABLE, len(ref)) != ref:
+                return False
+            # a different bit pattern at each round, which the next burst read must also see
+            a = patterns[i & 3]
+            b = (1 << (i & 7)) ^ 0xFF
+            pattern = bytes((a, b, a ^ 0xFF, b ^ 0xFF))
+            bus.write_bytes(APDS9960_AILTL, pattern[0], pattern[1], pattern[2], pattern[3])
+            if bus.write_read(APDS9960_AILTL, 4) != pattern:
+                return False
+            ref[APDS9960_AILTL - APDS9960_ENABLE:APDS9960_AIHTH - APDS9960_ENABLE + 1] = pattern
+        return True
+
+    def _testEngine(self, enable, gmode, reg, flag, limit):
+        # power cycle the engine alone and wait for its data valid flag
+        self.configure(enable=0, gmode=0)
+        self._update(APDS9960_GCONF4, APDS9960_GFIFO_CLR, APDS9960_GFIFO_CLR)
+        self.write_read(APDS9960_CICLEAR, 1)
+        t_start = self._now()
+        self.configure(enable=enable, gmode=gmode)
+        while True:
+            t = self._now() - t_start
+            if self.write_read(reg, 1)[0] & flag:
+                return t
+            if t > limit:
+                return None
+            self._sleep(1)
+
+    def configure(self, **fields):
+        '''
+.. method:: configure(**fields)
+
+        Sets several register fields at once, e.g. ``configure(ggain=GGAIN_4X, gldrive=LED_DRIVE_100MA, gwtime=GWTIME_2_8MS)``.
+        Field names are the keys of ``FIELDS``. Fields are grouped by register and each affected register
+        is written exactly once; it is read first only if some of its bits are left untouched.
+        The whole update holds the bus lock. Do not mix a whole register and one of its fields in the same call.
+        Raises ValueError on unknown field names.
+
+        Returns True if successful.
+
+        '''
+        masks = {}
+        values = {}
+        for name in fields:
+            if name not in FIELDS:
+                raise ValueError
+            reg, shift, width = FIELDS[name]
+            val = fields[name]
+            if width == 16:
+                self._mergeField(masks, values, reg, 0xFF, val & 0xFF)
+                self._mergeField(masks, values, reg + 1, 0xFF, (val >> 8) & 0xFF)
+            else:
+                mask = ((1 << width) - 1) << shift
+                self._mergeField(masks, values, reg, mask, (val << shift) & mask)
+
+        regs = [reg for reg in masks]
+        regs.sort()
+        self._lock.acquire()
+        try:
+            for reg in regs:
+                val = values[reg]
+                if masks[reg] != 0xFF:
+                    val |= self.bus.write_read(reg, 1)[0] & ~masks[reg]
+                self.bus.write_bytes(reg, val)
+        finally:
+            self._lock.release()
+        self.gesture_cycle_ = None
+        if 'atime' in fields:
+            self._als_full_scale = self._fullScale(fields['atime'])
+        return True
+
+    def _fullScale(self, atime):
+        full = ALS_CYCLE_COUNTS * (256 - atime)
+        if full > 65535:
+            return 65535
+        return full
+
+    def getAlsFullScale(self):
+        '''
+.. method:: getAlsFullScale()
+
+        Returns the digital full scale of the colour channels for the current ALS integration time,
+        ``min(65535, 1025 * (256 - ATIME))``: 1025 counts at the reset value of ATIME (0xFF).
+        ATIME is read once and then tracked through :meth:`configure`.
+
+        '''
+        if self._als_full_scale is None:
+            self._als_full_scale = self._fullScale(self.write_read(APDS9960_ATIME, 1)[0])
+        return self._als_full_scale
+
+    def _mergeField(self, masks, values, reg, mask, val):
+        if reg in masks:
+            masks[reg] |= mask
+            values[reg] = (values[reg] & ~mask) | val
+        else:
+            masks[reg] = mask
+            values[reg] = val
+
+    def _setField(self, name, val):
+        reg, shift, width = FIELDS[name]
+        self._update(reg, ((1 << width) - 1) << shift, val << shift)
+
+    def _getField(self, name):
+        reg, shift, width = FIELDS[name]
+        if width == 16:
+            return self._read16(reg)
+        return (self.write_read(reg, 1)[0] >> shift) & ((1 << width) - 1)
+
     def getMode(self):
         '''
 .. method:: getMode()
@@ -319,28 +946,16 @@ class SL06(i2c.I2C):
         Returns True if successful
         '''
 
-        reg_val = self.getMode()
-        if reg_val == ERROR:
-            raise ValueError
-            
         enable = enable & 0x01
         
         if mode >= 0 and mode <= 6:
-            if enable == 1:
-                reg_val = reg_val | (1 << mode)
-            else:
-                reg_val = reg_val & ~(1 << mode)
+            self._update(APDS9960_ENABLE, 1 << mode, enable << mode)
         
         elif mode == ALL:
             if enable == 1:
-                reg_val = 0x7F
+                self._update(APDS9960_ENABLE, 0xFF, 0x7F)
             else:
-                reg_val = 0x00
-        
-        try:
-            self.write_bytes(APDS9960_ENABLE, reg_val)
-        except Exception as e:
-            raise e
+                self._update(APDS9960_ENABLE, 0xFF, 0x00)
             
         return True
 
@@ -354,14 +969,12 @@ class SL06(i2c.I2C):
         :param interrupts: Input True to enable hardware interrupt on light level. Defaults to False
 
         '''
-        self.setAmbientLightGain(DEFAULT_AGAIN)
         if interrupts == True:
-            self.setAmbientLightIntEnable(1)
+            aien = 1
         else:
-            self.setAmbientLightIntEnable(0)
+            aien = 0
             
-        self.enablePower()
-        self.setMode(AMBIENT_LIGHT, 1)
+        self.configure(again=DEFAULT_AGAIN, aien=aien, pon=1, aen=1)
 
     def disableLightSensor(self):
         '''
@@ -373,6 +986,69 @@ class SL06(i2c.I2C):
         self.setAmbientLightIntEnable(0)
         self.setmode(AMBIENT_LIGHT, 0)
 
+    def enableLightTracking(self, band=0.1, minimum=16, persistence=None):
+        '''
+.. method:: enableLightTracking(band=0.1, minimum=16, persistence=None)
+
+        Starts the light sensor in change detection mode: the ALS interrupt window (AILT, AIHT) follows
+        the light level, so the interrupt fires only when the clear channel moves out of a band around
+        the level seen at the previous interrupt. After each interrupt the window must be re-centred with
+        :meth:`recentreLightWindow`, which :meth:`poll` does by itself.
+        The window is initially inverted to force a first interrupt that centres it.
+        Exception raised if unsuccessful.
+
+        :param band: Half-width of the window, relative to the clear channel level
+        :param minimum: Minimum half-width of the window, in counts, so that low light levels do not fire on noise
+        :param persistence: If given, APERS code (1-15) setting the consecutive out-of-window readings needed for an interrupt: codes 1 to 3 mean 1 to 3 readings, codes 4 to 15 mean 5, 10, 15 ... 60 readings. Code 0 (interrupt on every cycle) would defeat the tracking and raises ValueError
+
+        '''
+        if persistence is not None and (persistence < 1 or persistence > 15):
+            raise ValueError
+        self._light_band = band
+        self._light_min = minimum
+        if persistence is None:
+            self.configure(ailt=0xFFFF, aiht=0, aien=1, pon=1, aen=1)
+        else:
+            self.configure(ailt=0xFFFF, aiht=0, apers=persistence, aien=1, pon=1, aen=1)
+
+    def disableLightTracking(self):
+        '''
+.. method:: disableLightTracking()
+
+        Leaves the change detection mode and disables the ALS interrupt. The light sensor is left running.
+
+        '''
+        self._light_band = None
+        self.setAmbientLightIntEnable(0)
+
+    def recentreLightWindow(self, clear=None):
+        '''
+.. method:: recentreLightWindow(clear=None)
+
+        Centres the ALS interrupt window on the current light level, with the band set by
+        :meth:`enableLightTracking`, in a single burst write of AILT and AIHT, then clears the ALS interrupt.
+        Exception raised if unsuccessful.
+
+        :param clear: Clear channel level to centre on; read from the sensor if not given
+
+        Returns the clear channel level used.
+
+        '''
+        if clear is None:
+            clear = self._read16(APDS9960_CDATAL)
+        delta = int(clear * self._light_band)
+        if delta < self._light_min:
+            delta = self._light_min
+        low = clear - delta
+        if low < 0:
+            low = 0
+        high = clear + delta
+        if high > 0xFFFF:
+            high = 0xFFFF
+        self.write_bytes(APDS9960_AILTL, low & 0xFF, low >> 8, high & 0xFF, high >> 8)
+        self.clearAmbientLightInt()
+        return clear
+
     def enableProximitySensor(self, interrupts = False):
         '''
 .. method:: enableProximitySensor(interrupts)
@@ -383,14 +1059,11 @@ class SL06(i2c.I2C):
         :param interrupts: Input True to enable hardware interrupt on proximity detection. Defaults to False
 
         '''
-        self.setProximityGain(DEFAULT_PGAIN)
-        self.setLEDDrive(DEFAULT_LDRIVE)
         if interrupts == True:
-            self.setProximityIntEnable(1)
+            pien = 1
         else:
-            self.setProximityIntEnable(0)
-        self.enablePower()
-        self.setMode(PROXIMITY, 1)
+            pien = 0
+        self.configure(pgain=DEFAULT_PGAIN, ldrive=DEFAULT_LDRIVE, pien=pien, pon=1, pen=1)
 
     def disableProximitySensor(self):
         '''
@@ -414,17 +1087,12 @@ class SL06(i2c.I2C):
         '''
         try:
             self.resetGestureParameters()
-            self.write_bytes(APDS9960_WTIME, 0xFF)
-            self.setLEDBoost(LED_BOOST_300)
             if interrupts == True:
-                self.setGestureIntEnable(1)
+                gien = 1
             else:
-                self.setGestureIntEnable(0)
-            self.setGestureMode(1)
-            self.enablePower()
-            self.setMode(WAIT, 1)
-            self.setMode(PROXIMITY, 1)
-            self.setMode(GESTURE, 1)
+                gien = 0
+            self.configure(wtime=0xFF, led_boost=LED_BOOST_300, gien=gien, gmode=1,
+                pon=1, wen=1, pen=1, gen=1)
         except Exception as e:
             raise e
 
@@ -463,29 +1131,49 @@ class SL06(i2c.I2C):
         else:
             return False
 
-    def getGesture(self):
+    def getGesture(self, detail=False):
         '''
-.. method:: getGesture()
+.. method:: getGesture(detail=False)
             
         Processes a gesture event and returns best guessed gesture.
+
+        :param detail: Input True to get a :class:`GestureResult` instead of the direction only. Defaults to False
         
-        Returns the gesture direction as a string literal.
+        Returns the gesture direction as a string literal, or a :class:`GestureResult` if *detail* is True.
+        A gesture FIFO overflow drops the gesture in progress, see :meth:`getGestureOverflows`.
 
         '''
         fifo_level = 0
         fifo_data =[]
+        waiting = 0
         
         # Make sure that power and gesture is on and data is valid */
         mode = self.getMode() & 0b01000001
         if not self.isGestureAvailable() or not mode:
+            if detail:
+                return GestureResult()
             return DIR_NONE
         
         
+        t_start = self._now()
+        prof = self.gesture_stats_
+        if prof:
+            prof.gestures += 1
+            t = t_start
+
         # Keep looping as long as gesture data is valid */
         while True:
         
             # Wait some time to collect next batch of FIFO data */
-            sleep(FIFO_PAUSE_TIME)
+            if self.gesture_adaptive_:
+                self._sleep(self._gesturePause(fifo_level, waiting))
+            else:
+                self._sleep(FIFO_PAUSE_TIME)
+            if prof:
+                prof.iterations += 1
+                t1 = self._now()
+                prof.sleep_time += t1 - t
+                t = t1
             
             # Get the contents of the STATUS register. Is data still valid? */
             try:
@@ -494,55 +1182,267 @@ class SL06(i2c.I2C):
                 raise e
             
             
+            # On FIFO overflow the data is no longer a continuous gesture: discard it and start over */
+            if gstatus & APDS9960_GFOV:
+                self._gestureOverflow()
+                fifo_level = 0
+                waiting = 0
+                if prof:
+                    t1 = self._now()
+                    prof.bus_time += t1 - t
+                    t = t1
+                continue
+
             # If we have valid data, read in FIFO */
             if (gstatus & APDS9960_GVALID) == APDS9960_GVALID:
-                 #Read the current FIFO level
+                # Read the current FIFO level and drain it without releasing the bus
+                self._lock.acquire()
                 try:
-                    fifo_level = self.write_read(APDS9960_GFLVL, 1)[0]
-                except Exception as e:
-                    raise e
-            
-
-                # If there's stuff in the FIFO, read it into our data block 
-
-                if fifo_level > 0:
-
-                    try:
-                        fifo_data = self.write_read(APDS9960_GFIFO_U, fifo_level * 4)
-                    except Exception as e:
-                        raise e
-                        
-                    #sleep(1000)
+                    fifo_level = self.bus.write_read(APDS9960_GFLVL, 1)[0]
+                    drained = fifo_level
+
+                    # Adaptive pauses: too few datasets to process while the FIFO is still filling, leave them for the next read
+                    if self.gesture_adaptive_ and waiting < fifo_level < GESTURE_MIN_DATASETS:
+                        waiting = fifo_level
+                        drained = 0
+                    else:
+                        waiting = 0
+
+                    # If there's stuff in the FIFO, read it into our data block
+                    if drained > 0:
+                        fifo_data = self.bus.write_read(APDS9960_GFIFO_U, drained * 4)
+                finally:
+                    self._lock.release()
+
+                if prof:
+                    prof.fifo_levels[min(fifo_level, 32)] += 1
+                    t1 = self._now()
+                    prof.bus_time += t1 - t
+                    t = t1
+
+                if drained > 0:
+                    #self._sleep(1000)
                     # If at least 1 set of data, sort the data into U/D/L/R */
                     if len(fifo_data)>=4:
-                        for i  in range(0 ,len(fifo_data), 4):
-                            self.gesture_data_.u_data[self.gesture_data_.index]=fifo_data[i + 0]
-                            self.gesture_data_.d_data[self.gesture_data_.index]=fifo_data[i + 1]
-                            self.gesture_data_.l_data[self.gesture_data_.index]=fifo_data[i + 2]
-                            self.gesture_data_.r_data[self.gesture_data_.index]=fifo_data[i + 3]
-                            self.gesture_data_.index+=1
-                            self.gesture_data_.total_gestures+=1
-                        
-                        # # Filter and process gesture data. Decode near/far state */
-                        if self.processGestureData():
-                            if self.decodeGesture():
-                                pass
-
-                        # Reset data */
-                        self.gesture_data_.index = 0
-                        self.gesture_data_.total_gestures = 0
+                        self.feedGestureData(fifo_data)
+
+                        # Commit early if the swipe is already unambiguous */
+                        commit = self.gesture_early_commit_ and self.decodeGesture() and self._gestureConfidence() >= self.gesture_early_commit_
+                        if prof:
+                            t1 = self._now()
+                            prof.decode_time += t1 - t
+                            t = t1
+                        if commit:
+                            self._update(APDS9960_GCONF4, APDS9960_GFIFO_CLR, APDS9960_GFIFO_CLR)
+                            return self._gestureDone(t_start, detail)
             else: 
                
                 #Determine best guessed gesture and clean up */
-                sleep(FIFO_PAUSE_TIME)
+                if not self.gesture_adaptive_:
+                    self._sleep(FIFO_PAUSE_TIME)
+                if prof:
+                    t1 = self._now()
+                    prof.sleep_time += t1 - t
+                    t = t1
                 if not self.decodeGesture():
                     pass
+                if prof:
+                    prof.decode_time += self._now() - t
+
+                return self._gestureDone(t_start, detail)
+
+    def feedGestureData(self, fifo_data):
+        '''
+.. method:: feedGestureData(fifo_data)
+
+        Runs one FIFO read through the gesture decoder, as :meth:`getGesture` does after each read.
+        Useful to decode recorded FIFO data without a sensor; call :meth:`decodeGesture` at the end of
+        the gesture, read ``gesture_motion_`` and :meth:`resetGestureParameters` before the next one.
+
+        :param fifo_data: raw FIFO bytes, U/D/L/R for each dataset (at most 32 datasets)
+
+        '''
+        self.gesture_datasets_ += len(fifo_data) // 4
+        for i  in range(0 ,len(fifo_data), 4):
+            self.gesture_data_.u_data[self.gesture_data_.index]=fifo_data[i + 0]
+            self.gesture_data_.d_data[self.gesture_data_.index]=fifo_data[i + 1]
+            self.gesture_data_.l_data[self.gesture_data_.index]=fifo_data[i + 2]
+            self.gesture_data_.r_data[self.gesture_data_.index]=fifo_data[i + 3]
+            self.gesture_data_.index+=1
+            self.gesture_data_.total_gestures+=1
+        
+        # # Filter and process gesture data. Decode near/far state */
+        if self.processGestureData():
+            if self.decodeGesture():
+                pass
+
+        # Reset data */
+        self.gesture_data_.index = 0
+        self.gesture_data_.total_gestures = 0
+
+    def _gestureOverflow(self):
+        # clear the FIFO, counting the discarded datasets, and reset the decoder
+        self._lock.acquire()
+        try:
+            level = self.bus.write_read(APDS9960_GFLVL, 1)[0]
+            gconf4 = self.bus.write_read(APDS9960_GCONF4, 1)[0]
+            self.bus.write_bytes(APDS9960_GCONF4, gconf4 | APDS9960_GFIFO_CLR)
+        finally:
+            self._lock.release()
+        self.gesture_overflows_ += 1
+        self.gesture_dropped_ += level + self.gesture_datasets_
+        self.resetGestureParameters()
+
+    def getGestureOverflows(self):
+        '''
+.. method:: getGestureOverflows()
+
+        Returns a tuple (overflows, dropped) with the number of gesture FIFO overflows seen by :meth:`getGesture`
+        and the number of datasets discarded to recover from them, already read or still in the FIFO.
+        Datasets that the sensor could not store (at least one per overflow) are not counted.
 
-                motion = self.gesture_motion_
+        On overflow (GFOV) the FIFO is cleared and the gesture decoder is reset, so the partial
+        gesture is dropped and decoding starts again from the next datasets.
+
+        '''
+        return (self.gesture_overflows_, self.gesture_dropped_)
+
+    def resetGestureOverflows(self):
+        '''
+.. method:: resetGestureOverflows()
+
+        Clears the overflow counters.
+
+        '''
+        self.gesture_overflows_ = 0
+        self.gesture_dropped_ = 0
+
+    def _gestureDone(self, t_start, detail):
+        self.gesture_latency_ = self._now() - t_start
+        prof = self.gesture_stats_
+        if prof:
+            prof.total_time += self.gesture_latency_
+            if prof.iterations - prof._iterations_start > prof.max_iterations:
+                prof.max_iterations = prof.iterations - prof._iterations_start
+            prof._iterations_start = prof.iterations
+        motion = self.gesture_motion_
+        if detail:
+            motion = self._gestureResult()
     
-                self.resetGestureParameters()
-                return motion
+        self.resetGestureParameters()
+        return motion
+
+    def _gestureConfidence(self):
+        if self.gesture_motion_ == DIR_NEAR or self.gesture_motion_ == DIR_FAR:
+            return 1
+        if self.gesture_motion_ == DIR_NONE:
+            return 0
+        strength = max(abs(self.gesture_ud_delta_), abs(self.gesture_lr_delta_))
+        return min(1, strength / (2 * GESTURE_SENSITIVITY_1_FX))
+
+    def _gestureResult(self):
+        res = GestureResult()
+        res.direction = self.gesture_motion_
+        res.ud_delta = self.gesture_ud_delta_ / GESTURE_RATIO_ONE
+        res.lr_delta = self.gesture_lr_delta_ / GESTURE_RATIO_ONE
+        res.datasets = self.gesture_datasets_
+        # the datasets are produced one per gesture engine cycle, whatever the FIFO read timing
+        if self.gesture_cycle_ is None:
+            self.gesture_cycle_ = self._gestureCycleTime()
+        res.duration = (self.gesture_datasets_ * self.gesture_cycle_ + 500) // 1000
+        res.latency = self.gesture_latency_
+        res.confidence = self._gestureConfidence()
+
+        strength = max(abs(res.ud_delta), abs(res.lr_delta))
+        if res.duration > 0:
+            res.speed = strength * 1000 / res.duration
+        return res
+
+    def setAdaptiveGesturePause(self, enable, early_commit=0):
+        '''
+.. method:: setAdaptiveGesturePause(enable, early_commit=0)
 
+        Enables or disables adaptive FIFO pauses in :meth:`getGesture`.
+        When enabled, the wait before each FIFO read is derived from the configured
+        gesture wait time (GWTIME), pulse count and length, and from the last FIFO level,
+        instead of the fixed ``FIFO_PAUSE_TIME``; the final pause after the gesture ends is skipped.
+        Each read targets about ``GESTURE_READ_DATASETS`` datasets, since the decoder compares the first and
+        last dataset of a read: while the FIFO is still filling, fewer than ``GESTURE_MIN_DATASETS`` are left
+        in it for the next read rather than drained and discarded.
+
+        :param enable: Input True to enable adaptive pauses
+        :param early_commit: Confidence (0 to 1) at which a gesture is returned without waiting for its end, 0 to disable. The remaining FIFO data is cleared.
+
+        '''
+        self.gesture_adaptive_ = enable
+        self.gesture_early_commit_ = early_commit
+        self.gesture_cycle_ = None
+
+    def enableGestureStats(self, enable=True):
+        '''
+.. method:: enableGestureStats(enable=True)
+
+        Enables or disables the accumulation of :class:`GestureStats` inside :meth:`getGesture`.
+        Enabling resets the statistics.
+
+        '''
+        if enable:
+            self.gesture_stats_ = GestureStats()
+        else:
+            self.gesture_stats_ = None
+
+    def getGestureStats(self):
+        '''
+.. method:: getGestureStats()
+
+        Returns the :class:`GestureStats` accumulated since they were enabled or reset, None if disabled.
+
+        '''
+        return self.gesture_stats_
+
+    def resetGestureStats(self):
+        '''
+.. method:: resetGestureStats()
+
+        Clears the gesture statistics, if enabled.
+
+        '''
+        if self.gesture_stats_:
+            self.gesture_stats_ = GestureStats()
+
+    def getGestureLatency(self):
+        '''
+.. method:: getGestureLatency()
+
+        Returns the time in ms spent in the last :meth:`getGesture` call that processed a gesture.
+
+        '''
+        return self.gesture_latency_
+
+    def _gestureCycleTime(self):
+        # estimated time (us) between two FIFO datasets
+        gwtime = self.write_read(APDS9960_GCONF2, 1)[0] & 0b00000111
+        gpulse = self.write_read(APDS9960_GPULSE, 1)[0]
+        pulses = (gpulse & 0b00111111) + 1
+        plen = GPLEN_US[(gpulse >> 6) & 0b00000011]
+        # U/D and L/R pairs are integrated one after the other, plus ~0.5ms of overhead
+        return GWTIME_US[gwtime] + 2 * pulses * plen + 500
+
+    def _gesturePause(self, fifo_level, waiting=0):
+        if self.gesture_cycle_ is None:
+            self.gesture_cycle_ = self._gestureCycleTime()
+        # wait for about GESTURE_READ_DATASETS datasets, counting those left in the FIFO,
+        # less if the FIFO is filling up
+        if fifo_level >= GESTURE_FIFO_HIGH:
+            pause = self.gesture_cycle_
+        else:
+            pause = (GESTURE_READ_DATASETS - waiting) * self.gesture_cycle_
+        pause = (pause + 999) // 1000
+        if pause < 1:
+            return 1
+        if pause > FIFO_PAUSE_TIME:
+            return FIFO_PAUSE_TIME
+        return pause
 
     def enablePower(self):
         '''
@@ -572,13 +1472,9 @@ class SL06(i2c.I2C):
         Returns the ambient light measurement.
 
         '''
-        try:
-            val_l = self.write_read(APDS9960_CDATAL, 1)[0]
-            val_h = self.write_read(APDS9960_CDATAH, 1)[0]
-        except Exception as e:
-            raise e
+        val = self._read16(APDS9960_CDATAL)
 
-        return val_l + (val_h << 8)
+        return self._filter(CHANNEL_CLEAR, val)
 
     def getRedLight(self):
         '''
@@ -591,13 +1487,9 @@ class SL06(i2c.I2C):
 
         '''
 
-        try:
-            val_l = self.write_read(APDS9960_RDATAL, 1)[0]
-            val_h = self.write_read(APDS9960_RDATAH, 1)[0]
-        except Exception as e:
-            raise e
+        val = self._read16(APDS9960_RDATAL)
 
-        return val_l + (val_h << 8)
+        return self._filter(CHANNEL_RED, val)
 
     def getBlueLight(self):
         '''
@@ -609,13 +1501,9 @@ class SL06(i2c.I2C):
         Returns the blue light level.
 
         '''
-        try:
-            val_l = self.write_read(APDS9960_GDATAL, 1)[0]
-            val_h = self.write_read(APDS9960_GDATAH, 1)[0]
-        except Exception as e:
-            raise e
+        val = self._read16(APDS9960_GDATAL)
 
-        return val_l + (val_h << 8)
+        return self._filter(CHANNEL_BLUE, val)
 
     def getGreenLight(self):
         '''
@@ -627,36 +1515,235 @@ class SL06(i2c.I2C):
         Returns the green light level.
 
         '''
-        try:
-            val_l = self.write_read(APDS9960_BDATAL, 1)[0]
-            val_h = self.write_read(APDS9960_BDATAH, 1)[0]
-        except Exception as e:
-            raise e
+        val = self._read16(APDS9960_BDATAL)
 
-        return val_l + (val_h << 8)
+        return self._filter(CHANNEL_GREEN, val)
 
-    def getProximity(self):
+    def getColourData(self):
         '''
-.. method:: getProximity()
+.. method:: getColourData()
         
-        Reads the proximity level.
+        Reads clear, red, green and blue levels in a single burst transaction,
+        so the four values belong to the same integration cycle.
         Exception raised if unsuccessful.
 
-        Returns the proximity level.
+        Returns a tuple (clear, red, green, blue).
 
         '''
-        val = 0
+        data = self.write_read(APDS9960_CDATAL, 8)
+        return (data[0] | (data[1] << 8), data[2] | (data[3] << 8), data[4] | (data[5] << 8), data[6] | (data[7] << 8))
+
+    def getFrame(self, clear_flags=False):
+        '''
+.. method:: getFrame(clear_flags=False)
+        
+        Reads STATUS, clear, red, green, blue and proximity in a single burst transaction.
+        Exception raised if unsuccessful.
+
+        :param clear_flags: Input True to clear the saturation and interrupt flags (CICLEAR) after the read. Defaults to False
+
+        Returns a :class:`SensorFrame`.
+
+        '''
+        full_scale = self.getAlsFullScale()
+        self._lock.acquire()
         try:
-            val = self.write_read(APDS9960_PDATA, 1)[0]
-        except Exception as e:
-            raise e
+            frame = SensorFrame(self.bus.write_read(APDS9960_STATUS, 10), full_scale)
+            if clear_flags and (frame.status & (APDS9960_CPSAT | APDS9960_PGSAT | APDS9960_AINT | APDS9960_PINT)):
+                self.bus.write_read(APDS9960_CICLEAR, 1)
+        finally:
+            self._lock.release()
+        return frame
+
+    def captureLight(self, buf, cycles=1):
+        '''
+.. method:: captureLight(buf, cycles=1)
+        
+        High-rate capture of the clear channel for flicker analysis (see the :mod:`flicker` module).
+        The ALS integration time is set to *cycles* steps of 2.78ms and the other engines are stopped,
+        so the ALS engine integrates back to back. The STATUS and clear channel registers are polled in
+        a single burst, and a sample is stored only when AVALID is set: reading the clear channel clears
+        AVALID, so each sample is exactly one new integration and the sampling instants follow the sensor
+        clock, not the host clock. The first integration, which may have started with the previous settings, is discarded.
+        The previous ENABLE and ATIME settings are restored at the end, also when a read fails.
+        Exception raised if unsuccessful, TimeoutError if the ALS engine stops producing data.
+
+        :param buf: preallocated list (or array) to fill, its length sets the number of samples
+        :param cycles: integration time in 2.78ms steps, 1 to 256 (1 samples at 359.7Hz); ValueError otherwise
+
+        Returns a tuple (fs, missed): the sampling frequency in Hz, set by the integration time, and the number
+        of integrations completed but not read because the host polled too late. The samples are uniformly
+        spaced only if *missed* is 0; the count comes from the millisecond clock over the whole capture,
+        so it is exact to within one integration.
 
-        return val
+        '''
+        if cycles < 1 or cycles > 256:
+            raise ValueError
+        cycle = 2780 * cycles                       # integration time in us
+        limit = 2 * cycle // 1000 + STARTUP_TIME    # longest wait for a new integration, in ms
+        enable = self.write_read(APDS9960_ENABLE, 1)[0]
+        atime = self.write_read(APDS9960_ATIME, 1)[0]
+        self.configure(atime=256 - cycles, enable=APDS9960_PON | APDS9960_AEN)
+        n = len(buf)
+        try:
+            # reading the clear channel drops a result from before the new settings
+            self.write_read(APDS9960_STATUS, 3)
+            i = -1
+            t_first = t_last = t_wait = self._now()
+            while i < n:
+                data = self.write_read(APDS9960_STATUS, 3)
+                t = self._now()
+                if data[0] & APDS9960_AVALID:
+                    if i >= 0:
+                        buf[i] = data[1] | (data[2] << 8)
+                    if i == 0:
+                        t_first = t
+                    t_last = t_wait = t
+                    i += 1
+                elif t - t_wait > limit:
+                    raise TimeoutError
+                else:
+                    self._sleep(1)
+        finally:
+            self.configure(atime=atime, enable=enable)
+
+        fs = 1000000 / cycle
+        if n < 2:
+            return (fs, 0)
+        missed = ((t_last - t_first) * 1000 + cycle // 2) // cycle - (n - 1)
+        if missed < 0:
+            missed = 0
+        return (fs, missed)
+
+    def onEvent(self, kind, handler):
+        '''
+.. method:: onEvent(kind, handler)
 
-    def resetGestureParameters(self):
-        #Resets all the parameters in the gesture data member
+        Registers the function called by :meth:`poll` for an event kind.
 
-        self.gesture_data_.index = 0
+        :param kind: EVENT_LIGHT, EVENT_PROXIMITY or EVENT_GESTURE
+        :param handler: function called with an :class:`Event`, None to remove the handler
+
+        '''
+        if kind < EVENT_LIGHT or kind > EVENT_GESTURE:
+            raise ValueError
+        self._handlers[kind] = handler
+
+    def poll(self):
+        '''
+.. method:: poll()
+
+        Checks all engines with a single burst read from STATUS to GSTATUS, which also carries the
+        colour and proximity data, and dispatches an :class:`Event` to the registered handlers for:
+
+        * new ALS data (AVALID): EVENT_LIGHT
+        * new proximity data (PVALID): EVENT_PROXIMITY
+        * gesture data in the FIFO (GVALID): EVENT_GESTURE, decoded with :meth:`getGesture`
+
+        With :meth:`enableLightTracking`, EVENT_LIGHT is dispatched only on ALS interrupts (AINT), that is on
+        significant light changes, and the interrupt window is re-centred on the clear level of the burst.
+
+        Interrupt and saturation flags found set are cleared with CICLEAR.
+        Events without a handler are skipped, and so is the gesture FIFO if no gesture handler is registered.
+        An idle sensor costs one bus transaction per call.
+
+        Returns the number of events dispatched.
+
+        '''
+        full_scale = self.getAlsFullScale()
+        data = self.write_read(APDS9960_STATUS, APDS9960_GSTATUS - APDS9960_STATUS + 1)
+        frame = SensorFrame(data, full_scale)
+        count = 0
+
+        flags = frame.status & (APDS9960_CPSAT | APDS9960_PGSAT | APDS9960_AINT | APDS9960_PINT)
+        if self._light_band is None:
+            light = frame.als_valid
+        else:
+            light = flags & APDS9960_AINT
+            if light:
+                # the window must move before the interrupt is cleared, or it fires again
+                self.recentreLightWindow(frame.clear)
+                flags &= ~APDS9960_AINT
+
+        if flags:
+            self.write_read(APDS9960_CICLEAR, 1)
+
+        handler = self._handlers[EVENT_LIGHT]
+        if light and handler:
+            handler(Event(EVENT_LIGHT, (frame.clear, frame.red, frame.green, frame.blue), frame))
+            count += 1
+
+        handler = self._handlers[EVENT_PROXIMITY]
+        if frame.prox_valid and handler:
+            handler(Event(EVENT_PROXIMITY, frame.proximity, frame))
+            count += 1
+
+        handler = self._handlers[EVENT_GESTURE]
+        if (data[APDS9960_GSTATUS - APDS9960_STATUS] & APDS9960_GVALID) and handler:
+            direction = self.getGesture()
+            if direction != DIR_NONE:
+                handler(Event(EVENT_GESTURE, direction, None))
+                count += 1
+
+        return count
+
+    def getProximity(self):
+        '''
+.. method:: getProximity()
+        
+        Reads the proximity level.
+        Exception raised if unsuccessful.
+
+        Returns the proximity level.
+
+        '''
+        val = 0
+        try:
+            val = self.write_read(APDS9960_PDATA, 1)[0]
+        except Exception as e:
+            raise e
+
+        return self._filter(CHANNEL_PROXIMITY, val)
+
+    def attachFilter(self, channel, flt):
+        '''
+.. method:: attachFilter(channel, flt)
+
+        Attaches a streaming filter from the :mod:`filters` module, or a :class:`history.History`, to a channel.
+        Once attached, every reading of the channel is fed to the filter and the
+        channel getter returns the filtered value.
+
+        :param channel: CHANNEL_CLEAR, CHANNEL_RED, CHANNEL_GREEN, CHANNEL_BLUE or CHANNEL_PROXIMITY
+        :param flt: filter instance, any object with an ``update(value)`` method returning a number
+
+        '''
+        if channel < CHANNEL_CLEAR or channel > CHANNEL_PROXIMITY:
+            raise ValueError
+        self._filters[channel] = flt
+
+    def detachFilter(self, channel):
+        '''
+.. method:: detachFilter(channel)
+
+        Removes the filter attached to a channel, the getter returns raw readings again.
+
+        :param channel: CHANNEL_CLEAR, CHANNEL_RED, CHANNEL_GREEN, CHANNEL_BLUE or CHANNEL_PROXIMITY
+
+        '''
+        if channel < CHANNEL_CLEAR or channel > CHANNEL_PROXIMITY:
+            raise ValueError
+        self._filters[channel] = None
+
+    def _filter(self, channel, val):
+        flt = self._filters[channel]
+        if flt is None:
+            return val
+        return flt.update(val)
+
+    def resetGestureParameters(self):
+        #Resets all the parameters in the gesture data member
+
+        self.gesture_data_.index = 0
         self.gesture_data_.total_gestures = 0
     
         self.gesture_ud_delta_ = 0
@@ -671,6 +1758,8 @@ class SL06(i2c.I2C):
         self.gesture_state_ = 0
         self.gesture_motion_ = DIR_NONE
 
+        self.gesture_datasets_ = 0
+
     def processGestureData(self):
 
         u_first = 0
@@ -723,11 +1812,11 @@ class SL06(i2c.I2C):
             
         
         
-        # Calculate the first vs. last ratio of up/down and left/right */
-        ud_ratio_first = ((u_first - d_first) * 100) / (u_first + d_first)
-        lr_ratio_first = ((l_first - r_first) * 100) / (l_first + r_first)
-        ud_ratio_last = ((u_last - d_last) * 100) / (u_last + d_last)
-        lr_ratio_last = ((l_last - r_last) * 100) / (l_last + r_last)
+        # Calculate the first vs. last ratio of up/down and left/right, in fixed point */
+        ud_ratio_first = ((u_first - d_first) * GESTURE_RATIO_SCALE) // (u_first + d_first)
+        lr_ratio_first = ((l_first - r_first) * GESTURE_RATIO_SCALE) // (l_first + r_first)
+        ud_ratio_last = ((u_last - d_last) * GESTURE_RATIO_SCALE) // (u_last + d_last)
+        lr_ratio_last = ((l_last - r_last) * GESTURE_RATIO_SCALE) // (l_last + r_last)
 
        
         # Determine the difference between the first and last ratios */
@@ -739,18 +1828,18 @@ class SL06(i2c.I2C):
         self.gesture_lr_delta_ += lr_delta;
               
         # Determine U/D gesture */
-        if self.gesture_ud_delta_ >= GESTURE_SENSITIVITY_1:
+        if self.gesture_ud_delta_ >= GESTURE_SENSITIVITY_1_FX:
             self.gesture_ud_count_ = 1
-        elif self.gesture_ud_delta_ <= -GESTURE_SENSITIVITY_1:
+        elif self.gesture_ud_delta_ <= -GESTURE_SENSITIVITY_1_FX:
             self.gesture_ud_count_ = -1
         else:
             self.gesture_ud_count_ = 0
         
         
         # Determine L/R gesture */
-        if self.gesture_lr_delta_ >= GESTURE_SENSITIVITY_1:
+        if self.gesture_lr_delta_ >= GESTURE_SENSITIVITY_1_FX:
             self.gesture_lr_count_ = 1
-        elif self.gesture_lr_delta_ <= -GESTURE_SENSITIVITY_1:
+        elif self.gesture_lr_delta_ <= -GESTURE_SENSITIVITY_1_FX:
             self.gesture_lr_count_ = -1
         else: 
             self.gesture_lr_count_ = 0
@@ -758,7 +1847,7 @@ class SL06(i2c.I2C):
         
         # Determine Near/Far gesture */
         if (self.gesture_ud_count_ == 0) and (self.gesture_lr_count_ == 0): 
-            if (abs(ud_delta) < GESTURE_SENSITIVITY_2) and (abs(lr_delta) < GESTURE_SENSITIVITY_2): 
+            if (abs(ud_delta) < GESTURE_SENSITIVITY_2_FX) and (abs(lr_delta) < GESTURE_SENSITIVITY_2_FX): 
                 
                 if (ud_delta == 0) and (lr_delta == 0): 
                     self.gesture_near_count_+=1
@@ -776,7 +1865,7 @@ class SL06(i2c.I2C):
                 
             
         else: 
-            if (abs(ud_delta) < GESTURE_SENSITIVITY_2) and (abs(lr_delta) < GESTURE_SENSITIVITY_2): 
+            if (abs(ud_delta) < GESTURE_SENSITIVITY_2_FX) and (abs(lr_delta) < GESTURE_SENSITIVITY_2_FX): 
                     
                 if (ud_delta == 0) and (lr_delta == 0): 
                     self.gesture_near_count_+=1
@@ -801,42 +1890,15 @@ class SL06(i2c.I2C):
                 return True
         
         
-            # Determine swipe direction */
-            if (self.gesture_ud_count_ == -1) and (self.gesture_lr_count_ == 0): 
-                self.gesture_motion_ = DIR_UP
-            elif (self.gesture_ud_count_ == 1) and (self.gesture_lr_count_ == 0): 
-                self.gesture_motion_ = DIR_DOWN
-            elif (self.gesture_ud_count_ == 0) and (self.gesture_lr_count_ == 1): 
-                self.gesture_motion_ = DIR_RIGHT
-            elif (self.gesture_ud_count_ == 0) and (self.gesture_lr_count_ == -1): 
-                self.gesture_motion_ = DIR_LEFT
-            elif (self.gesture_ud_count_ == -1) and (self.gesture_lr_count_ == 1): 
-                if abs(self.gesture_ud_delta_) > abs(self.gesture_lr_delta_): 
-                    self.gesture_motion_ = DIR_UP
-                else:
-                    self.gesture_motion_ = DIR_RIGHT
-                
-            elif (self.gesture_ud_count_ == 1) and (self.gesture_lr_count_ == -1): 
-                if abs(self.gesture_ud_delta_) > abs(self.gesture_lr_delta_): 
-                    self.gesture_motion_ = DIR_DOWN
-                else:
-                    self.gesture_motion_ = DIR_LEFT
-                
-            elif (self.gesture_ud_count_ == -1) and (self.gesture_lr_count_ == -1): 
-                if abs(self.gesture_ud_delta_) > abs(self.gesture_lr_delta_): 
-                    self.gesture_motion_ = DIR_UP
-                else:
-                    self.gesture_motion_ = DIR_LEFT
-                
-            elif (self.gesture_ud_count_ == 1) and (self.gesture_lr_count_ == 1): 
-                if abs(self.gesture_ud_delta_) > abs(self.gesture_lr_delta_): 
-                    self.gesture_motion_ = DIR_DOWN
-                else:
-                    self.gesture_motion_ = DIR_RIGHT
-                
-            else: 
+            # Determine swipe direction: pick the stronger axis of a diagonal */
+            dirs = GESTURE_DIRECTIONS[self.gesture_ud_count_ * 3 + self.gesture_lr_count_ + 4]
+            if dirs is None:
                 self.gesture_motion_ = DIR_NONE
                 return False
+            if abs(self.gesture_ud_delta_) > abs(self.gesture_lr_delta_):
+                self.gesture_motion_ = dirs[0]
+            else:
+                self.gesture_motion_ = dirs[1]
         
         
             return True
@@ -846,13 +1908,7 @@ class SL06(i2c.I2C):
             return False
 
     def getProxIntLowThresh(self):
-        val = 0
-        try:
-            self.write_read(APDS9960_PILT, 1)[0]
-        except Exception as e:
-            raise e
-
-        return val
+        return self._getField('pilt')
 
     def setProxIntLowThresh(self, threshold):
         try:
@@ -879,132 +1935,37 @@ class SL06(i2c.I2C):
         return True  
 
     def getLEDDrive(self):
-        val = 0
         try:
-            val = self.write_read(APDS9960_CONTROL, 1)[0]
+            return self._getField('ldrive')
         except:
             return ERROR
 
-        return (val >> 6) & 0b00000011
-
     def setLEDDrive(self, drive):
-        val = 0
-        try:
-            val = self.write_read(APDS9960_CONTROL, 1)[0]
-        except PeripheralError as e:
-            raise e
-            
-        drive = drive & 0b00000011
-        drive = drive << 6
-        val = val & 0b00111111
-        val = val | drive
-        
-        try:
-            self.write_bytes(APDS9960_CONTROL, val)
-        except PeripheralError as e:
-            raise e
-        
+        self._setField('ldrive', drive)
         return True
 
     def getProximityGain(self):
-        val = 0
-        try:
-            val = self.write_read(APDS9960_CONTROL, 1)[0]
-        except Exception as e:
-            raise e
+        return self._getField('pgain')
 
-        val = (val >> 2) & 0b00000011
-        
-        return val
-        
     def setProximityGain(self, drive):
-        val = 0
-        try:
-            val = self.write_read(APDS9960_CONTROL, 1)[0]
-        except PeripheralError as e:
-            raise e
-        
-        drive = drive & 0b00000011
-        drive = drive << 2
-        val = val & 0b11110011
-        val = val | drive
-        
-        try:
-            self.write_bytes(APDS9960_CONTROL, val)
-        except PeripheralError as e:
-            raise e
-            
+        self._setField('pgain', drive)
         return True
 
     def getAmbientLightGain(self):
-        try:
-            val = self.write_read(APDS9960_CONTROL, 1)[0]
-        except Exception as e:
-            raise e
-            
-        #Shift and mask out ADRIVE bits */
-        val &= 0b00000011
-    
-        return val
+        return self._getField('again')
 
     def setAmbientLightGain(self, drive):
-        val = 0
-        try:
-            val = self.write_read(APDS9960_CONTROL, 1)[0]
-        except PeripheralError as e:
-            raise e
-        
-        drive = drive & 0b00000011
-        val = val & 0b11111100
-        val = val | drive
-        
-        try:
-            self.write_bytes(APDS9960_CONTROL, val)
-        except Exception as e:
-            raise e
-        
+        self._setField('again', drive)
         return True
-        
+
     def getLEDBoost(self):
-        val = 0
-        try:
-            val = self.write_read(APDS9960_CONFIG2, 1)[0]
-        except Exception as e:
-            raise e 
-            
-        val = (val >> 4) & 0b00000011 #Shift and mask out LED_BOOST bits
-        return val
+        return self._getField('led_boost')
 
     def setLEDBoost(self, boost):
-        val = 0
-        try:
-            val = self.write_read(APDS9960_CONFIG2, 1)[0]
-        except Exception as e:
-            raise e
-            
-        # Set bits in register to given value
-        boost &= 0b00000011
-        boost = boost << 4
-        val &= 0b11001111
-        val |= boost
-    
-        # Write register value back into CONFIG2 register
-        try:       
-            self.write_bytes(APDS9960_CONFIG2, val)
-        except Exception as e:
-            raise e
+        self._setField('led_boost', boost)
 
     def getProxGainCompEnable(self):
-        val = 0
-        try:
-            val = self.write_read(APDS9960_CONFIG3, 1)[0]
-        except Exception as e:
-            raise e 
-            
-         # Shift and mask out PCMP bits */
-        val = (val >> 5) & 0b00000001
-        
-        return val
+        return self._getField('pcmp')
 
 
 
@@ -1017,53 +1978,13 @@ class SL06(i2c.I2C):
             return True
             
     def setProxGainCompEnable(self, enable):
-        val = 0
-        try:
-            val = self.write_read(APDS9960_CONFIG3, 1)[0]
-        except Exception as e:
-            raise e
-            
-        # Set bits in register to given value */
-        enable &= 0b00000001
-        enable = enable << 5
-        val &= 0b11011111
-        val |= enable
-    
-        # Write register value back into CONFIG2 register
-        try:       
-            self.write_bytes(APDS9960_CONFIG3, val)
-        except Exception as e:
-            raise e
+        self._setField('pcmp', enable)
 
     def getProxPhotoMask(self):
-        val = 0
-        try:
-            val = self.write_read(APDS9960_CONFIG3, 1)[0]
-        except Exception as e:
-            raise e
-            
-        # Mask out photodiode enable mask bits */
-        val &= 0b00001111
-        
-        return val
+        return self._getField('prox_mask')
 
     def setProxPhotoMask(self, mask):
-        val = 0
-        try:
-            val = self.write_read(APDS9960_CONFIG3, 1)[0]
-        except Exception as e:
-            raise e 
-            
-        
-        # Set bits in register to given value */
-        mask &= 0b00001111
-        val &= 0b11110000
-        val |= mask
-    
-        try:       
-            self.write_bytes(APDS9960_CONFIG3, val)
-        except Exception as e:
-            raise e
+        self._setField('prox_mask', mask)
 
     def getGestureEnterThresh(self):
         val = 0
@@ -1097,109 +2018,26 @@ class SL06(i2c.I2C):
             raise e
 
     def getGestureGain(self):
-        val = 0
-        try:
-            val = self.write_read(APDS9960_GCONF2, 1)
-        except Exception as e:
-            raise e
-        
-        #Shift and mask out GGAIN bits */
-        val = (val >> 5) & 0b00000011
-    
-        return val
+        return self._getField('ggain')
 
     def setGestureGain(self, gain):
-        val = 0
-        try:
-            val = self.write_read(APDS9960_GCONF2, 1)[0]
-        except Exception as e:
-            raise e
-            
-        # Set bits in register to given value
-        gain &= 0b00000011
-        gain = gain << 5
-        val &= 0b10011111
-        val |= gain
-        
-        #Write register value back into GCONF2 register
-        try:       
-            self.write_bytes(APDS9960_GCONF2,val)
-            
-        except Exception as e:
-           raise e
+        self._setField('ggain', gain)
 
     def getGestureLEDDrive(self):
-        val = 0
-        try:
-            val = self.write_read(APDS9960_GCONF2, 1)[0]
-        except Exception as e:
-            raise e
-        
-        #Shift and mask out GLDRIVE bits */
-        val = (val >> 3) & 0b00000011
-    
-        return val
+        return self._getField('gldrive')
 
     def setGestureLEDDrive(self, drive):
-        val = 0
-        try:
-            val = self.write_read(APDS9960_GCONF2, 1)[0]
-        except Exception as e:
-            raise e
-        
-    
-        #Set bits in register to given value */
-        drive &= 0b00000011
-        drive = drive << 3
-        val &= 0b11100111
-        val |= drive
-        
-          #Write register value back into GCONF2 register
-        try:       
-            self.write_bytes(APDS9960_GCONF2,val)
-        except Exception as e:
-           raise e
+        self._setField('gldrive', drive)
 
     def getGestureWaitTime(self):
-        val = 0
-        try:
-            val = self.write_read(APDS9960_GCONF2, 1)[0]
-        except Exception as e:
-            raise e
-    
-        #Mask out GWTIME bits */
-        val &= 0b00000111
-    
-        return val
+        return self._getField('gwtime')
 
     def setGestureWaitTime(self, time):
-        val = 0
-        try:
-            val = self.write_read(APDS9960_GCONF2, 1)[0]
-        except Exception as e:
-            raise e
-    
-        #Set bits in register to given value
-        time &= 0b00000111
-        val &= 0b11111000
-        val |= time
-    
-        try:       
-            self.write_bytes(APDS9960_GCONF2,val)
-        except Exception as e:
-           raise e
+        self._setField('gwtime', time)
+        self.gesture_cycle_ = None
 
     def getLightIntLowThreshold(self):
-        valLow = 0
-        try:
-            val_low = self.write_read(APDS9960_AILTL, 1)[0]
-            val_high = self.write_read(APDS9960_AILTH, 1)[0]
-        except Exception as e:
-            raise e
-                    
-        
-        return val_low + (val_high << 8)
-
+        return self._getField('ailt')
 
     def setLightIntLowThreshold(self, threshold):
         val_low = 0
@@ -1208,23 +2046,14 @@ class SL06(i2c.I2C):
         val_high = (threshold & 0xFF00) >> 8
             
         try:
-            self.write_bytes(APDS9960_AILTL, val_low)
-            self.write_bytes(APDS9960_AILTH, val_high)
+            self.write_bytes(APDS9960_AILTL, val_low, val_high)
         except PeripheralError as e:
             raise e
             
             return True
         
     def getLightIntHighThreshold(self):
-        val_low = 0
-        val_high = 0
-        try:
-            val_low = self.write_read(APDS9960_AIHTL, 1)[0]
-            val_high = self.write_read(APDS9960_AIHTH, 1)[0]
-        except Exception as e:
-            raise e
-                
-        return val_low + (val_high << 8)
+        return self._getField('aiht')
 
     def setLightIntHighThreshold(self, threshold):
         val_low = 0
@@ -1233,8 +2062,7 @@ class SL06(i2c.I2C):
         val_high = (threshold & 0xFF00) >> 8
             
         try:
-            self.write_bytes(APDS9960_AIHTL, val_low)
-            self.write_bytes(APDS9960_AIHTH, val_high)
+            self.write_bytes(APDS9960_AIHTL, val_low, val_high)
         except Exception as e:
             raise e
                 
@@ -1270,90 +2098,33 @@ class SL06(i2c.I2C):
         return True
 
     def getAmbientLightIntEnable(self):
-        val = 0
         try:
-            val = self.write_read(APDS9960_ENABLE, 1)[0]
+            return self._getField('aien')
         except:
             return ERROR
-                
-        val = (val >> 4) & 0b00000001
-        return val
-
 
     def setAmbientLightIntEnable(self, enable):
-        val = 0
-        try:
-            val = self.write_read(APDS9960_ENABLE, 1)[0]
-        except Exception as e:
-            raise e
-
-        enable = enable & 0b00000001
-        enable = enable << 4
-        val = val & 0b11101111
-        val = val | enable
-            
-        try:
-            self.write_bytes(APDS9960_ENABLE, val)
-        except Exception as e:
-            raise e
-                
+        self._setField('aien', enable)
         return True
 
     def getProximityIntEnable(self):
-        val = 0
         try:
-            val = self.write_read(APDS9960_ENABLE, 1)[0]
+            return self._getField('pien')
         except:
             return ERROR
-        val = (val >> 5) & 0b00000001
-        return val
 
     def setProximityIntEnable(self, enable):
-        val = 0
-        try:
-            val = self.write_read(APDS9960_ENABLE, 1)[0]
-        except Exception as e:
-            raise e
-
-        enable = enable & 0b00000001
-        enable = enable << 5
-        val = val & 0b11011111
-        val = val | enable
-            
-        try:
-            self.write_bytes(APDS9960_ENABLE, val)
-        except Exception as e:
-            raise e
-                
+        self._setField('pien', enable)
         return True
 
     def getGestureIntEnable(self):
-        val = 0
         try:
-            val = self.write_read(APDS9960_GCONF4, 1)[0]
+            return self._getField('gien')
         except:
             return ERROR
-                
-        val = (val >> 1) & 0b00000001
-        return val
 
     def setGestureIntEnable(self, enable):
-        val = 0
-        try:
-            self.write_read(APDS9960_GCONF4, 1)[0]
-        except Exception as e:
-            raise e
-
-        enable = enable & 0b00000001
-        enable = enable << 1
-        val = val & 0b11111101
-        val = val | enable
-            
-        try:
-            self.write_bytes(APDS9960_GCONF4, val)
-        except Exception as e:
-            raise e
-                
+        self._setField('gien', enable)
         return True
 
     def clearAmbientLightInt(self):
@@ -1373,30 +2144,183 @@ class SL06(i2c.I2C):
         return True
 
     def getGestureMode(self, mode):
-        val = 0
         try:
-            val = self.write_read(APDS9960_GCONF4, 1)[0]
+            return self._getField('gmode')
         except:
             return ERROR
-        val &= 0b00000001
-        return val
 
     def setGestureMode(self, mode):
-        val = 0
-        try:
-            val = self.write_read(APDS9960_GCONF4, 1)[0]
-        except Exception as e:
-            raise e
-
-        mode = mode & 0b00000001
-        val = val & 0b11111110
-        val = val | mode
-            
-        try:
-            self.write_bytes(APDS9960_GCONF4, val)
-        except Exception as e:
-            raise e
-                
+        self._setField('gmode', mode)
         return True
-            
-        
\ No newline at end of file
+
+
+class Scheduler():
+    """
+=================
+ Scheduler class
+=================
+
+.. class:: Scheduler(sensor, light_period=1000, on_light=None, on_gesture=None)
+
+    Time-slices a single SL06 between gesture detection and ambient light/colour sampling.
+
+    Most of the time the sensor runs the gesture profile (proximity, wait and gesture engines).
+    Every *light_period* ms, if no gesture is in progress, it switches to the light profile
+    (ALS engine only), waits one integration cycle, reads clear, red, green and blue in a single
+    burst and switches back. The register sets of both profiles are built once from the current
+    configuration and cached, so a switch only writes the registers that differ between them,
+    usually ENABLE alone.
+
+    Configure the sensor (e.g. with :meth:`SL06.init` and :meth:`SL06.enableGestureSensor`) before
+    creating the scheduler; call :meth:`resync` if the configuration is changed afterwards.
+
+    :param sensor: SL06 instance
+    :param light_period: Time in ms between two light samples
+    :param on_light: Function called with (clear, red, green, blue) for every light sample
+    :param on_gesture: Function called with the direction of every detected gesture
+    """
+
+    def __init__(self, sensor, light_period=1000, on_light=None, on_gesture=None):
+        self.sensor = sensor
+        self.light_period = light_period
+        self.on_light = on_light
+        self.on_gesture = on_gesture
+        self.switches = 0
+        self.resync()
+
+    def resync(self):
+        '''
+.. method:: resync()
+
+        Rebuilds the cached register sets from the sensor configuration and
+        restarts from the gesture profile.
+
+        '''
+        s = self.sensor
+        enable = s.write_read(APDS9960_ENABLE, 1)[0]
+        atime = s.write_read(APDS9960_ATIME, 1)[0]
+        # ALS integration time is (256 - ATIME) * 2.78ms
+        self._integration = ((256 - atime) * 278 + 99) // 100
+
+        self._gesture_profile = ((APDS9960_ENABLE, (enable & ~APDS9960_AEN) | APDS9960_PON | APDS9960_WEN | APDS9960_PEN | APDS9960_GEN),)
+        self._light_profile = ((APDS9960_ENABLE, (enable & ~(APDS9960_WEN | APDS9960_PEN | APDS9960_GEN)) | APDS9960_PON | APDS9960_AEN),)
+        self._shadow = {APDS9960_ENABLE: enable}
+        self._apply(self._gesture_profile)
+        self._light = False
+        self._next_light = self.sensor._now() + self.light_period
+
+    def _apply(self, profile):
+        for reg, val in profile:
+            if self._shadow.get(reg) != val:
+                self.sensor.write_bytes(reg, val)
+                self._shadow[reg] = val
+
+    def step(self):
+        '''
+.. method:: step()
+
+        Runs one scheduling step: call it often from the application loop.
+        Callbacks are invoked from within this method.
+
+        Returns the gesture direction, a (clear, red, green, blue) tuple, or None if nothing was produced.
+
+        '''
+        s = self.sensor
+        now = self.sensor._now()
+        if self._light:
+            if now - self._light_start < self._integration:
+                return None
+            if not (s.write_read(APDS9960_STATUS, 1)[0] & APDS9960_AVALID):
+                return None
+            frame = s.getColourData()
+            self._apply(self._gesture_profile)
+            self.switches += 1
+            self._light = False
+            self._next_light = now + self.light_period
+            if self.on_light:
+                self.on_light(frame)
+            return frame
+
+        if s.isGestureAvailable() == True:
+            direction = s.getGesture()
+            if self.on_gesture and direction != DIR_NONE:
+                self.on_gesture(direction)
+            return direction
+
+        if now >= self._next_light:
+            self._apply(self._light_profile)
+            self.switches += 1
+            self._light = True
+            self._light_start = now
+        return None
+
+
+class ColourGate():
+    """
+==================
+ ColourGate class
+==================
+
+.. class:: ColourGate(sensor, threshold=50, hysteresis=10, persistence=4, on_item=None)
+
+    Proximity-gated colour sampling, for objects passing in front of the sensor.
+
+    The proximity interrupt is armed to fire when the proximity level stays above *threshold* for
+    *persistence* consecutive cycles. On that interrupt a single STATUS, colour and proximity burst is read
+    and the interrupt is re-armed to fire when the object leaves (proximity below *threshold* - *hysteresis*),
+    so each object is sampled once.
+
+    Call :meth:`poll` from the handler of the SL06 INT line (active low), or periodically:
+    when nothing happened it costs a single STATUS read.
+
+    :param sensor: SL06 instance, already initialized
+    :param threshold: proximity level that marks an object in front of the sensor
+    :param hysteresis: proximity drop below *threshold* that marks the object as gone
+    :param persistence: consecutive proximity cycles above threshold required (1 to 15); 0, an interrupt on every cycle, raises ValueError
+    :param on_item: function called with the :class:`SensorFrame` of every object
+    """
+
+    def __init__(self, sensor, threshold=50, hysteresis=10, persistence=4, on_item=None):
+        if persistence < 1 or persistence > 15:
+            raise ValueError
+        self.sensor = sensor
+        self.threshold = threshold
+        self.hysteresis = hysteresis
+        self.on_item = on_item
+        self.items = 0
+        sensor.configure(ppers=persistence, pgain=DEFAULT_PGAIN, ldrive=DEFAULT_LDRIVE, pilt=0, piht=threshold,
+            pon=1, aen=1, pen=1, pien=1)
+        sensor.clearProximityInt()
+        self.present = False
+
+    def poll(self):
+        '''
+.. method:: poll()
+
+        Checks the proximity interrupt and samples the colour of a newly arrived object.
+
+        Returns the :class:`SensorFrame` of the new object, None otherwise.
+
+        '''
+        s = self.sensor
+        if not (s.write_read(APDS9960_STATUS, 1)[0] & APDS9960_PINT):
+            return None
+
+        if self.present:
+            # object gone: wait for the next one
+            s.configure(pilt=0, piht=self.threshold)
+            s.clearProximityInt()
+            self.present = False
+            return None
+
+        frame = s.getFrame()
+        low = self.threshold - self.hysteresis
+        if low < 0:
+            low = 0
+        s.configure(pilt=low, piht=0xFF)
+        s.clearProximityInt()
+        self.present = True
+        self.items += 1
+        if self.on_item:
+            self.on_item(frame)
+        return frame
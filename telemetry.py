@@ -0,0 +1,221 @@
+"""
+.. module:: telemetry
+
+*****************
+Telemetry Module
+*****************
+
+Compact binary encoding of SL06 readings for logging and transmission.
+
+Every record starts with a header byte: the high nibble is the record type, the low
+nibble holds flags. All multi-byte fields are little endian.
+
+=============== ==================================================== =======
+Record          Layout                                               Size
+=============== ==================================================== =======
+colour          header, u32 timestamp, u16 clear, red, green, blue   13
+colour (delta)  header, u16 timestamp delta, i8 clear, red, green,   7
+                blue deltas
+proximity       header, u32 timestamp, u8 proximity                  6
+prox. (delta)   header, u16 timestamp delta, u8 proximity            4
+gesture         header, u32 timestamp, u8 direction code             6
+=============== ==================================================== =======
+
+Timestamps are in milliseconds (e.g. ``timers.now()``) and wrap at 32 bits. Delta records
+are only emitted when the previous record of the same type is known and the differences fit
+in the delta fields; a full record is forced every *keyframe* records so that a decoder can
+resynchronize on a lossy link.
+
+The module has no dependency on the Zerynth runtime so the same :class:`Decoder` runs on the host.
+
+    """
+
+import struct
+
+# Record types #
+RECORD_COLOUR           = 0x10
+RECORD_PROXIMITY        = 0x20
+RECORD_GESTURE          = 0x30
+
+# Header flags #
+FLAG_DELTA              = 0x01
+
+# Direction codes, same strings as the sl06 DIR_* definitions #
+DIRECTIONS = ('none', 'left', 'right', 'up', 'down', 'near', 'far', 'all')
+
+class Encoder():
+    """
+.. class:: Encoder(delta=False, keyframe=16)
+
+    Packs readings into binary records.
+
+    :param delta: Emit delta records between consecutive frames when possible
+    :param keyframe: Number of records after which a full record is forced in delta mode
+    """
+
+    def __init__(self, delta=False, keyframe=16):
+        self.delta = delta
+        self.keyframe = keyframe
+        self.reset()
+
+    def reset(self):
+        '''
+.. method:: reset()
+
+        Forgets the previous frames, the next records are full records.
+
+        '''
+        self._colour = None
+        self._colour_ts = 0
+        self._colour_n = 0
+        self._prox_ts = None
+        self._prox_n = 0
+
+    def colour(self, ts, clear, red, green, blue):
+        '''
+.. method:: colour(ts, clear, red, green, blue)
+
+        Encodes a colour frame.
+
+        :param ts: timestamp in milliseconds
+
+        Returns the encoded record as bytes.
+
+        '''
+        ts &= 0xFFFFFFFF
+        prev = self._colour
+        self._colour = (clear, red, green, blue)
+        if self.delta and prev is not None and self._colour_n < self.keyframe:
+            dt = (ts - self._colour_ts) & 0xFFFFFFFF
+            dc = clear - prev[0]
+            dr = red - prev[1]
+            dg = green - prev[2]
+            db = blue - prev[3]
+            if dt <= 0xFFFF and -128 <= dc <= 127 and -128 <= dr <= 127 and -128 <= dg <= 127 and -128 <= db <= 127:
+                self._colour_ts = ts
+                self._colour_n += 1
+                return struct.pack("<BHbbbb", RECORD_COLOUR | FLAG_DELTA, dt, dc, dr, dg, db)
+        self._colour_ts = ts
+        self._colour_n = 0
+        return struct.pack("<BIHHHH", RECORD_COLOUR, ts, clear, red, green, blue)
+
+    def proximity(self, ts, value):
+        '''
+.. method:: proximity(ts, value)
+
+        Encodes a proximity reading.
+
+        :param ts: timestamp in milliseconds
+
+        Returns the encoded record as bytes.
+
+        '''
+        ts &= 0xFFFFFFFF
+        prev = self._prox_ts
+        self._prox_ts = ts
+        if self.delta and prev is not None and self._prox_n < self.keyframe:
+            dt = (ts - prev) & 0xFFFFFFFF
+            if dt <= 0xFFFF:
+                self._prox_n += 1
+                return struct.pack("<BHB", RECORD_PROXIMITY | FLAG_DELTA, dt, value)
+        self._prox_n = 0
+        return struct.pack("<BIB", RECORD_PROXIMITY, ts, value)
+
+    def gesture(self, ts, direction):
+        '''
+.. method:: gesture(ts, direction)
+
+        Encodes a gesture event.
+
+        :param ts: timestamp in milliseconds
+        :param direction: one of the sl06 DIR_* strings
+
+        Returns the encoded record as bytes.
+
+        '''
+        return struct.pack("<BIB", RECORD_GESTURE, ts & 0xFFFFFFFF, DIRECTIONS.index(direction))
+
+class Decoder():
+    """
+.. class:: Decoder()
+
+    Unpacks a stream of records produced by :class:`Encoder`. The decoder keeps the
+    previous frame of each type to expand delta records, so a stream must be decoded
+    in order by the same instance.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        '''
+.. method:: reset()
+
+        Forgets the previous frames.
+
+        '''
+        self._colour = None
+        self._colour_ts = 0
+        self._prox_ts = None
+
+    def decode(self, data):
+        '''
+.. method:: decode(data)
+
+        Decodes a buffer holding one or more complete records.
+        Raises ValueError on unknown, truncated or out of sequence records.
+
+        Returns a list of tuples ``(record_type, timestamp, value)`` where *value* is a
+        ``(clear, red, green, blue)`` tuple for colour records, an integer for proximity
+        records and a DIR_* string for gesture records.
+
+        '''
+        records = []
+        pos = 0
+        size = len(data)
+        while pos < size:
+            header = data[pos]
+            kind = header & 0xF0
+            delta = header & FLAG_DELTA
+            if kind == RECORD_COLOUR:
+                if delta:
+                    if self._colour is None or pos + 7 > size:
+                        raise ValueError
+                    dt, dc, dr, dg, db = struct.unpack("<Hbbbb", data[pos + 1:pos + 7])
+                    prev = self._colour
+                    ts = (self._colour_ts + dt) & 0xFFFFFFFF
+                    value = (prev[0] + dc, prev[1] + dr, prev[2] + dg, prev[3] + db)
+                    pos += 7
+                else:
+                    if pos + 13 > size:
+                        raise ValueError
+                    ts, c, r, g, b = struct.unpack("<IHHHH", data[pos + 1:pos + 13])
+                    value = (c, r, g, b)
+                    pos += 13
+                self._colour = value
+                self._colour_ts = ts
+            elif kind == RECORD_PROXIMITY:
+                if delta:
+                    if self._prox_ts is None or pos + 4 > size:
+                        raise ValueError
+                    dt, value = struct.unpack("<HB", data[pos + 1:pos + 4])
+                    ts = (self._prox_ts + dt) & 0xFFFFFFFF
+                    pos += 4
+                else:
+                    if pos + 6 > size:
+                        raise ValueError
+                    ts, value = struct.unpack("<IB", data[pos + 1:pos + 6])
+                    pos += 6
+                self._prox_ts = ts
+            elif kind == RECORD_GESTURE:
+                if pos + 6 > size:
+                    raise ValueError
+                ts, code = struct.unpack("<IB", data[pos + 1:pos + 6])
+                if code >= len(DIRECTIONS):
+                    raise ValueError
+                value = DIRECTIONS[code]
+                pos += 6
+            else:
+                raise ValueError
+            records.append((kind, ts, value))
+        return records